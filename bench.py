@@ -0,0 +1,577 @@
+"""Development tools for SecClock: benchmarks and the interaction-latency replay.
+
+    python bench.py --benchmark fonts
+    python bench.py --replay --save-baseline baseline.json
+    python bench.py --record-trace trace.json
+
+Not needed to run the clock; main.py stays the app and its --stream entry point."""
+import io, threading, json, os, sys, time, argparse, random, tempfile, shutil, socket, subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PIL import ImageFont
+from tkinter import messagebox
+
+from main import (
+    BACKGROUND_WORKERS, BASE_SIZE, CROSSFADE_FPS, DEFAULT_SETTINGS, FONT_PATH, MAX_WINDOW_WIDTH,
+    PROCEDURAL_CACHE, PROCEDURAL_KINDS, SIZE_PRESETS, TIME_SAMPLES, TWO_DIGITS,
+    BackgroundRotation, CrossfadeTransition, FolderProvider, FontService, ProceduralProvider, ScriptProvider,
+    SecClock, SntpReference, TimeSource, UrlListProvider,
+    generate_procedural_background, layout_world_rows, load_world_zones, ntp_timestamp, percentile,
+    prepare_background, render_text_image, scaled, window_size_for,
+)
+
+# Interaction-latency replay (--replay / --record-trace)
+TRACE_VERSION = 1
+REPLAY_TIMEOUT = 10.0                # seconds for an asynchronous interaction (↻) to reach the screen
+REPLAY_DISPLAY = ":97"               # Xvfb display started when there is none
+REPLAY_SETTINGS = {"background_providers": [{"type": "procedural"}], "run_on_startup": False}
+LATENCY_REGRESSION_RATIO = 1.25      # fail when p50 or p99 grows past this factor of the baseline...
+LATENCY_REGRESSION_SLACK_MS = 2.0    # ...and by more than this, so sub-millisecond noise can't fail a run
+# SettingsWindow variable behind each setting a trace may change
+SETTINGS_TRACE_VARS = {
+    "window_size": "size_var",
+    "window_width": "width_var",
+    "font_size": "font_size_var",
+    "font_color": "font_color_var",
+    "procedural_backgrounds": "procedural_bg_var",
+    "crossfade_backgrounds": "crossfade_var",
+    "display_mode": "display_mode_var",
+    "auto_contrast": "auto_contrast_var",
+    "contrast_style": "contrast_style_var",
+    "clock_mode": "clock_mode_var",
+}
+
+class LocalSntpServer:
+    """SNTP stand-in on a local UDP port: answers with this machine's time plus a fixed offset and random jitter"""
+    def __init__(self, offset=0.0, jitter=0.0, host="127.0.0.1", port=0):
+        self.offset_ns = int(offset * 1e9)
+        self.jitter_ns = int(jitter * 1e9)
+        self.random = random.Random(1)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.address = "%s:%d" % self.sock.getsockname()
+        threading.Thread(target=self.serve, daemon=True).start()
+    
+    def serve(self):
+        while True:
+            try:
+                request, client = self.sock.recvfrom(512)
+            except OSError:
+                return
+            # One jitter value per reply, like an asymmetric network path
+            offset = self.offset_ns + self.random.randint(-self.jitter_ns, self.jitter_ns)
+            received = time.time_ns() + offset
+            reply = bytearray(48)
+            reply[0] = 0x1C  # leap 0, version 3, server
+            reply[1] = 1     # stratum 1
+            reply[24:32] = request[40:48]
+            reply[32:40] = ntp_timestamp(received)
+            reply[40:48] = ntp_timestamp(time.time_ns() + offset)
+            self.sock.sendto(reply, client)
+    
+    def close(self):
+        self.sock.close()
+
+def synthetic_trace(rounds=5, seed=1):
+    """Drag paths, ↻ clicks and settings round trips, repeated rounds times"""
+    rng = random.Random(seed)
+    events = []
+    for round_index in range(rounds):
+        x, y = BASE_SIZE[0] // 2 - 40, BASE_SIZE[1] // 2
+        path = [(x, y)]
+        for _ in range(30):
+            x += rng.randint(-6, 6)
+            y += rng.randint(-4, 4)
+            path.append((x, y))
+        events += [
+            {"interaction": "drag", "path": path},
+            {"interaction": "background"},
+            {"interaction": "settings_open"},
+            {"interaction": "settings_apply", "changes": {"font_size": DEFAULT_SETTINGS["font_size"] + 4 * (round_index % 2)}},
+            {"interaction": "settings_close"},
+        ]
+    return {"version": TRACE_VERSION, "events": events}
+
+class TraceRecorder:
+    """Records a live session's drags, ↻ / ⚙ clicks and applied settings as a replayable trace"""
+    def __init__(self, app):
+        self.app = app
+        self.events = []
+        self.path = None
+        self.settings_before = None
+        self.bind_canvas()
+        app.bg_btn.configure(command=self.on_background)
+        app.settings_btn.configure(command=self.on_settings)
+    
+    def bind_canvas(self):
+        # Applying settings re-binds the drag handlers, which drops ours
+        self.app.canvas.bind("<Button-1>", self.on_press, add="+")
+        self.app.canvas.bind("<B1-Motion>", self.on_motion, add="+")
+        self.app.canvas.bind("<ButtonRelease-1>", self.on_release, add="+")
+    
+    def on_press(self, event):
+        self.path = [(event.x, event.y)]
+    
+    def on_motion(self, event):
+        if self.path is not None:
+            self.path.append((event.x, event.y))
+    
+    def on_release(self, event):
+        if self.path and len(self.path) > 1:
+            self.events.append({"interaction": "drag", "path": self.path})
+        self.path = None
+    
+    def on_background(self):
+        self.events.append({"interaction": "background"})
+        self.app.change_background_threaded()
+    
+    def on_settings(self):
+        self.events.append({"interaction": "settings_open"})
+        self.settings_before = dict(self.app.settings.settings)
+        self.app.show_settings()
+        if self.app.settings_window:
+            self.app.settings_window.window.bind("<Destroy>", self.on_settings_closed, add="+")
+    
+    def on_settings_closed(self, event):
+        if event.widget is not self.app.settings_window.window:
+            return
+        # Only settings the replay can set through the window's variables
+        changes = {key: value for key, value in self.app.settings.settings.items()
+                   if key in SETTINGS_TRACE_VARS and self.settings_before.get(key) != value}
+        if changes:
+            self.events.append({"interaction": "settings_apply", "changes": changes})
+        self.events.append({"interaction": "settings_close"})
+        self.bind_canvas()
+    
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"version": TRACE_VERSION, "events": self.events}, f, indent=1)
+        print(f"Recorded {len(self.events)} interactions to {path}")
+
+class InteractionReplay:
+    """Replays a trace against a live SecClock and collects event-to-frame latency per interaction"""
+    def __init__(self, app):
+        self.app = app
+        self.samples = {}  # interaction -> seconds
+        self.shown = False
+        show_background = app.show_background
+        
+        def observed_show_background(*args):
+            show_background(*args)
+            self.shown = True
+        
+        app.show_background = observed_show_background
+    
+    def frame(self, started):
+        """Flush pending redraws (the event has reached the screen) and return the latency"""
+        self.app.root.update_idletasks()
+        return time.perf_counter() - started
+    
+    def record(self, interaction, seconds):
+        self.samples.setdefault(interaction, []).append(seconds)
+    
+    def drag(self, event):
+        canvas = self.app.canvas
+        x, y = event["path"][0]
+        canvas.event_generate("<Button-1>", x=x, y=y)
+        for x, y in event["path"][1:]:
+            started = time.perf_counter()
+            canvas.event_generate("<B1-Motion>", x=x, y=y)
+            self.record("drag", self.frame(started))
+        canvas.event_generate("<ButtonRelease-1>", x=x, y=y)
+    
+    def background(self, event):
+        self.shown = False
+        started = time.perf_counter()
+        self.app.bg_btn.invoke()
+        # Fetched on a worker, applied when the UI dispatcher next drains
+        while not self.shown:
+            if time.perf_counter() - started > REPLAY_TIMEOUT:
+                raise TimeoutError("background change never reached the screen")
+            self.app.root.update()
+            time.sleep(0.001)
+        self.record("background", self.frame(started))
+    
+    def settings_open(self, event):
+        started = time.perf_counter()
+        self.app.settings_btn.invoke()
+        if self.app.settings_window is None:
+            raise RuntimeError("settings window did not open")
+        self.record("settings_open", self.frame(started))
+    
+    def settings_apply(self, event):
+        window = self.app.settings_window
+        for key, value in event.get("changes", {}).items():
+            getattr(window, SETTINGS_TRACE_VARS[key]).set(value)
+        started = time.perf_counter()
+        window.apply_settings()
+        self.record("settings_apply", self.frame(started))
+    
+    def settings_close(self, event):
+        started = time.perf_counter()
+        self.app.settings_window.window.destroy()
+        self.app.settings_window = None
+        self.record("settings_close", self.frame(started))
+    
+    def run(self, trace, repeat=1):
+        # Dialogs would block the replay: info boxes are skipped, error boxes fail it
+        def fail(title, message, **options):
+            raise RuntimeError(f"{title}: {message}")
+        saved = messagebox.showinfo, messagebox.showerror
+        messagebox.showinfo, messagebox.showerror = (lambda *args, **options: None), fail
+        try:
+            for _ in range(repeat):
+                for event in trace["events"]:
+                    getattr(self, event["interaction"])(event)
+                    self.app.root.update()
+        finally:
+            messagebox.showinfo, messagebox.showerror = saved
+    
+    def results(self):
+        results = {}
+        for interaction, samples in self.samples.items():
+            samples = sorted(samples)
+            results[interaction] = {
+                "count": len(samples),
+                "p50": percentile(samples, 0.5) * 1000,
+                "p99": percentile(samples, 0.99) * 1000,
+            }
+        return results
+
+def latency_regressions(results, baseline, ratio=LATENCY_REGRESSION_RATIO, slack_ms=LATENCY_REGRESSION_SLACK_MS):
+    """Interactions whose p50 or p99 grew past ratio x baseline (and by more than slack_ms)"""
+    regressions = []
+    for interaction, reference in baseline.items():
+        current = results.get(interaction)
+        if current is None:
+            regressions.append(f"{interaction}: not measured")
+            continue
+        for stat in ("p50", "p99"):
+            limit = max(reference[stat] * ratio, reference[stat] + slack_ms)
+            if current[stat] > limit:
+                regressions.append(f"{interaction} {stat}: {current[stat]:.2f} ms > {limit:.2f} ms "
+                                   f"(baseline {reference[stat]:.2f} ms)")
+    return regressions
+
+def ensure_display():
+    """On Linux without a display, start Xvfb. Returns the Xvfb process, or None if a display exists"""
+    if not sys.platform.startswith("linux") or os.environ.get("DISPLAY"):
+        return None
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        raise SystemExit("No display: install Xvfb or run under xvfb-run")
+    display = REPLAY_DISPLAY
+    process = subprocess.Popen([xvfb, display, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    socket_path = f"/tmp/.X11-unix/X{display[1:]}"
+    deadline = time.perf_counter() + 5.0
+    while not os.path.exists(socket_path):
+        if process.poll() is not None or time.perf_counter() > deadline:
+            process.kill()
+            raise SystemExit(f"Xvfb failed to start on {display}")
+        time.sleep(0.05)
+    os.environ["DISPLAY"] = display
+    return process
+
+def run_replay(args):
+    """Replay a trace (or the synthetic one) against the real window and check it against a baseline"""
+    if args.replay:
+        with open(args.replay) as f:
+            trace = json.load(f)
+    else:
+        trace = synthetic_trace()
+    xvfb = ensure_display()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            # Fresh settings with local backgrounds only, so the network can't dominate ↻
+            settings_file = os.path.join(workdir, "settings.json")
+            with open(settings_file, "w") as f:
+                json.dump({**DEFAULT_SETTINGS, **REPLAY_SETTINGS}, f)
+            app = SecClock(settings_file=settings_file, desktop=False)
+            app.root.update()
+            replay = InteractionReplay(app)
+            replay.run(trace, args.repeat)
+            results = replay.results()
+            app.quit_app()
+    finally:
+        if xvfb:
+            xvfb.terminate()
+    
+    print(f"Interaction latency, event to frame ({len(trace['events'])} events x {args.repeat}):")
+    for interaction, stats in results.items():
+        print(f"  {interaction:<15} p50 {stats['p50']:8.2f} ms  p99 {stats['p99']:8.2f} ms  ({stats['count']} samples)")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"Baseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = latency_regressions(results, baseline, args.max_regression)
+        if regressions:
+            print("Latency regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+def benchmark_procedural(repeats=20):
+    """Generation time of each procedural kind at each size preset (cache bypassed)"""
+    print(f"Procedural backgrounds, {repeats} runs each:")
+    for size_preset, size in SIZE_PRESETS.items():
+        for kind in PROCEDURAL_KINDS:
+            timings = []
+            for seed in range(repeats):
+                PROCEDURAL_CACHE.clear()
+                start = time.perf_counter()
+                generate_procedural_background(kind, seed, size)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            print(f"  {size_preset:<7} {size[0]}x{size[1]:<4} {kind:<9} "
+                  f"best {timings[0] * 1000:6.2f} ms  median {timings[len(timings) // 2] * 1000:6.2f} ms")
+
+def benchmark_crossfade(duration_ms=600):
+    """Achieved crossfade fps per size preset: worker blending, frames pulled on the CROSSFADE_FPS cadence"""
+    print(f"Crossfade {duration_ms} ms at {CROSSFADE_FPS} fps target (canvas paste not included):")
+    for size_preset, size in SIZE_PRESETS.items():
+        old_image = prepare_background(generate_procedural_background("gradient", 1, size), size)
+        new_image = prepare_background(generate_procedural_background("noise", 2, size), size)
+        
+        # Unpaced: how fast this machine can blend at all
+        transition = CrossfadeTransition(old_image, new_image, duration_ms)
+        start = time.perf_counter()
+        for step in range(1, transition.steps + 1):
+            transition.blend(step, transition.buffers[0])
+        max_fps = transition.steps / (time.perf_counter() - start)
+        
+        # Paced like the UI: worker thread produces, consumer pulls once per interval
+        transition = CrossfadeTransition(old_image, new_image, duration_ms)
+        transition.start()
+        next_tick = time.perf_counter()
+        while not (transition.done or transition.timed_out):
+            next_tick += transition.interval
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+            transition.next_frame()
+        elapsed = time.perf_counter() - transition.started
+        print(f"  {size_preset:<7} {size[0]}x{size[1]:<4} {transition.shown / elapsed:5.1f} fps achieved "
+              f"({transition.shown}/{transition.steps} frames, stride {transition.stride}), "
+              f"max blend {max_fps:6.0f} fps, worst blend {max(transition.blend_times, default=0) * 1000:.2f} ms")
+
+def benchmark_providers(repeats=20, latency_ms=30):
+    """Each provider type in isolation against local stand-ins, then how the rotation spreads ↻ across them"""
+    jpeg = io.BytesIO()
+    generate_procedural_background("noise", 1, (800, 600)).save(jpeg, "JPEG", quality=85)
+    jpeg = jpeg.getvalue()
+    
+    class ImageHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency_ms / 1000)
+            if self.path != "/image.jpg":
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(jpeg)))
+            self.end_headers()
+            self.wfile.write(jpeg)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ImageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    with tempfile.TemporaryDirectory() as folder:
+        for index in range(3):
+            with open(os.path.join(folder, f"bg{index}.jpg"), "wb") as f:
+                f.write(jpeg)
+        script = os.path.join(folder, "stand_in.py")
+        with open(script, "w") as f:
+            f.write("from PIL import Image\n"
+                    "def sources():\n    return ['red', 'green', 'blue']\n"
+                    "def fetch(source, size):\n    return Image.new('RGB', size, source)\n")
+        
+        providers = [
+            UrlListProvider([f"{base_url}/image.jpg"], name="http"),
+            FolderProvider(folder),
+            ProceduralProvider(),
+            ScriptProvider(script),
+        ]
+        size = BASE_SIZE
+        print(f"Background providers, {repeats} fetches each at {size[0]}x{size[1]} (HTTP stand-in adds {latency_ms} ms):")
+        for provider in providers:
+            timings = []
+            for _ in range(repeats):
+                PROCEDURAL_CACHE.clear()
+                start = time.perf_counter()
+                prepare_background(provider.fetch(provider.next_source(), size), size)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            print(f"  {provider.name:<10} median {timings[len(timings) // 2] * 1000:7.2f} ms  "
+                  f"worst {timings[-1] * 1000:7.2f} ms  (cost {provider.cost}, hint {provider.latency_hint * 1000:.0f} ms)")
+        
+        # Rotation with one dead provider: it should be probed less and less
+        broken = UrlListProvider([f"{base_url}/missing.jpg"], name="broken")
+        rotation = BackgroundRotation([providers[0], providers[2], broken], ProceduralProvider(name="offline"), random.Random(1))
+        load = lambda source, refresh, size, opener: prepare_background(opener(source, size), size)
+        shown = {}
+        executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS)
+        start = time.perf_counter()
+        for _ in range(repeats * 3):
+            provider = rotation.fetch(size, load, executor).result()[0]
+            shown[provider.name] = shown.get(provider.name, 0) + 1
+        elapsed = time.perf_counter() - start
+        executor.shutdown()
+        print(f"Rotation, {repeats * 3} changes in {elapsed:.2f} s, shown: "
+              + ", ".join(f"{name} {count}" for name, count in sorted(shown.items())))
+        print("\n".join("  " + line for line in rotation.report().splitlines()))
+    server.shutdown()
+
+def benchmark_world(ticks=3600):
+    """World-clock per-tick cost for 1-50 zones: cached offsets vs a tz conversion per zone, plus shared glyphs"""
+    import zoneinfo
+    keys = sorted(key for key in zoneinfo.available_timezones() if "/" in key and not key.startswith(("Etc/", "SystemV/")))
+    start_utc = int(time.time())
+    size = BASE_SIZE
+    print(f"World clock, {ticks} one-second ticks per run at {size[0]}x{size[1]}:")
+    for count in (1, 2, 5, 12, 25, 50):
+        zones_keys = [keys[index * len(keys) // count] for index in range(count)]
+        started = time.perf_counter()
+        zones = load_world_zones(zones_keys)
+        setup = time.perf_counter() - started
+        
+        # Cached: integer add per zone, swap counting as the canvas update would
+        shown = [[None, None, None] for _ in zones]
+        swaps = 0
+        started = time.perf_counter()
+        for utc in range(start_utc, start_utc + ticks):
+            for zone, row in zip(zones, shown):
+                parts = zone.parts(utc)
+                for slot in range(3):
+                    if parts[slot] != row[slot]:
+                        row[slot] = parts[slot]
+                        swaps += 1
+        cached = (time.perf_counter() - started) / ticks
+        
+        started = time.perf_counter()
+        for utc in range(start_utc, start_utc + ticks):
+            for zone in zones:
+                datetime.fromtimestamp(utc, zone.zone).strftime("%H:%M:%S")
+        converted = (time.perf_counter() - started) / ticks
+        
+        # Every row draws from one digit glyph set; only the city labels grow with the zone count
+        rows, row_height, _ = layout_world_rows(count, size)
+        digits = {part for row in shown for part in row} | set(TWO_DIGITS)
+        font_size = min(scaled(DEFAULT_SETTINGS["font_size"], size), int(row_height * 0.8))
+        try:
+            font = ImageFont.truetype(FONT_PATH, font_size)
+        except Exception:
+            font = None
+        started = time.perf_counter()
+        for text in digits | {":"}:
+            render_text_image(text, font, DEFAULT_SETTINGS["font_color"])
+        glyphs = time.perf_counter() - started
+        print(f"  {count:>2} zones ({rows} rows/page): {cached * 1e6:7.1f} us/tick cached vs {converted * 1e6:7.1f} us/tick converted, "
+              f"{swaps / ticks:5.2f} swaps/tick, setup {setup * 1000:5.1f} ms, "
+              f"{len(digits) + 1} shared glyphs in {glyphs * 1000:.0f} ms + {count} labels")
+
+def benchmark_fonts(repeats=20):
+    """Parse time of the full font vs the digits-only subset per size, and what the face cache saves"""
+    service = FontService()
+    started = time.perf_counter()
+    subset = service.subset_file()
+    build = time.perf_counter() - started
+    if subset:
+        print(f"Digit subset: {os.path.getsize(subset)} bytes vs {os.path.getsize(FONT_PATH)} bytes full "
+              f"(first build / lookup {build * 1000:.0f} ms)")
+    else:
+        print("Digit subset unavailable (install fontTools); timing the full font only")
+    sizes = sorted({scaled(DEFAULT_SETTINGS["font_size"], size) for size in SIZE_PRESETS.values()}
+                   | {scaled(DEFAULT_SETTINGS["font_size"], window_size_for(MAX_WINDOW_WIDTH))})
+    print(f"Font parse, median of {repeats} uncached loads:")
+    for font_size in sizes:
+        line = f"  {font_size:>4} px  full"
+        for path in ([FONT_PATH, subset] if subset else [FONT_PATH]):
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                ImageFont.truetype(path, font_size).getbbox("00:00:00")
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            line += f" {timings[len(timings) // 2] * 1000:6.3f} ms" + ("  subset" if path == FONT_PATH and subset else "")
+        print(line)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        service.face(sizes[0], digits_only=bool(subset))
+    print(f"  cached face lookup {(time.perf_counter() - start) / repeats * 1e6:.1f} us")
+
+def benchmark_time(repeats=100_000, offset=0.5, jitter=0.005):
+    """Per-tick formatting cost (datetime + strftime vs integer parts), then SNTP sync against a local stand-in"""
+    source = TimeSource()
+    source.poll_once()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        now = datetime.now()
+        now.strftime("%H"), now.strftime("%M"), now.strftime("%S")
+    formatted = (time.perf_counter() - started) / repeats
+    started = time.perf_counter()
+    for _ in range(repeats):
+        source.local_parts()
+    integer = (time.perf_counter() - started) / repeats
+    print(f"Clock parts per tick: {formatted * 1e6:.2f} us datetime.now + 3 strftime vs {integer * 1e6:.2f} us time source")
+    mismatches = 0
+    for _ in range(1000):
+        now = datetime.now()
+        if source.local_parts()[:2] != (now.strftime("%H"), now.strftime("%M")):
+            mismatches += 1
+    print(f"  HH:MM mismatches against datetime.now in 1000 reads: {mismatches}")
+    
+    server = LocalSntpServer(offset, jitter)
+    source = TimeSource(SntpReference(server.address))
+    print(f"SNTP against a local stand-in {offset * 1000:+.0f} ms off with +/-{jitter * 1000:.0f} ms jitter:")
+    for poll in range(1, TIME_SAMPLES + 1):
+        source.poll_once()
+        if poll in (1, 2, TIME_SAMPLES):
+            print(f"  after {poll} polls: {source.report().splitlines()[1]}, jitter {source.jitter_ns / 1e6:.2f} ms")
+    server.close()
+    
+    # A later correction is slewed in, never stepped: sample the applied offset as time passes
+    source.add_sample(source.slew[2] + 300_000_000, 0)
+    mono = time.monotonic_ns()
+    steps = [(seconds, source.correction_ns(mono + seconds * 1_000_000_000)) for seconds in (0, 1, 2, 4, 6, 8)]
+    print("  +300 ms correction applied over time: "
+          + ", ".join(f"{seconds} s {correction / 1e6:+.0f} ms" for seconds, correction in steps))
+
+BENCHMARKS = {
+    "procedural": benchmark_procedural,
+    "crossfade": benchmark_crossfade,
+    "providers": benchmark_providers,
+    "world": benchmark_world,
+    "fonts": benchmark_fonts,
+    "time": benchmark_time,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SecClock benchmarks and interaction-latency replay")
+    parser.add_argument("--benchmark", choices=list(BENCHMARKS.keys()), help="Run a benchmark and exit")
+    parser.add_argument("--record-trace", metavar="FILE", help="Run the clock normally and record drags, clicks and settings changes")
+    parser.add_argument("--replay", nargs="?", const="", metavar="FILE",
+                        help="Replay a recorded trace (default: built-in synthetic trace) and report latency")
+    parser.add_argument("--repeat", type=int, default=1, help="Times to replay the trace")
+    parser.add_argument("--baseline", help="Exit 1 if --replay latency regresses against this results file")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Write --replay results as a baseline")
+    parser.add_argument("--max-regression", type=float, default=LATENCY_REGRESSION_RATIO,
+                        help="Allowed p50/p99 growth factor over the baseline")
+    args = parser.parse_args()
+    
+    if args.benchmark:
+        BENCHMARKS[args.benchmark]()
+    elif args.replay is not None:
+        run_replay(args)
+    elif args.record_trace:
+        app = SecClock()
+        recorder = TraceRecorder(app)
+        app.root.mainloop()
+        recorder.save(args.record_trace)
+    else:
+        parser.print_help()
@@ -1,25 +1,38 @@
-import io, requests, threading, json, os, sys
+import io, requests, threading, json, os, sys, time, argparse, colorsys, queue, random, importlib.util
+import math, socket, struct
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+import numpy as np
 from datetime import datetime
-from PIL import Image, ImageTk, ImageDraw, ImageFont
+from zoneinfo import ZoneInfo
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PIL import Image, ImageTk, ImageDraw, ImageFont, ImageColor, ImageFilter
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pystray
-from pystray import MenuItem as item
-import win32api, win32con, win32gui
+try:
+    import pystray
+    from pystray import MenuItem as item
+except Exception:
+    # No tray backend (e.g. replaying traces under Xvfb): the window still works
+    pystray = None
+try:
+    import win32api, win32con, win32gui
+except ImportError:
+    # Not Windows: power, idle, refresh-rate and startup-registry features fall back to defaults
+    win32api = win32con = win32gui = None
 import webbrowser
+try:
+    # Optional: builds the digits-only font subset
+    from fontTools import subset as font_subset
+except ImportError:
+    font_subset = None
 
 # Paths
-import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ICON_PATH = os.path.join(BASE_DIR, "assets", "SecClock.ico")
 FONT_PATH = os.path.join(BASE_DIR, "fonts", "Blooming.otf")
-
-# Separate mask paths for each size
-MASK_PATHS = {
-    "small": os.path.join(BASE_DIR, "assets", "mask_small.png"),
-    "medium": os.path.join(BASE_DIR, "assets", "mask_medium.png"),
-    "large": os.path.join(BASE_DIR, "assets", "mask_large.png")
-}
+FONT_CACHE_DIR = os.path.join(BASE_DIR, "cache", "fonts")
 
 # Social Media Icons
 SOCIAL_ICONS = {
@@ -36,6 +49,24 @@ SIZE_PRESETS = {
     "large": (600, 338)     # 125% of medium
 }
 
+# Continuous sizing: any width (times the DPI scale), height follows the 480x270 ratio
+BASE_SIZE = SIZE_PRESETS["medium"]  # font_size and layout metrics are specified at this size
+MIN_WINDOW_WIDTH = 240
+MAX_WINDOW_WIDTH = 3840
+ASSET_CACHE_SIZE = 24  # source images and masked backgrounds across sizes
+GLYPH_CACHE_SIZE = 12  # glyph and world-label sets across sizes and digit styles
+MASK_CACHE_SIZE = 8
+FONT_CACHE_SIZE = 12  # FreeType faces (size x full / subset)
+FONT_SUBSET_TEXT = "0123456789:."  # everything the clock digits are drawn from
+
+# Procedural mask shape (fitted to mask_medium.png), used at every size so the silhouette
+# never changes while resizing: straight top, curved sides, flat bottom
+MASK_CURVE_TOP = 0.28      # curve starts at this fraction of the height
+MASK_CURVE_BOTTOM = 0.757  # flat bottom edge
+MASK_BOTTOM_HALF_WIDTH = 0.38
+MASK_CURVE_EXPONENTS = (2.5, 1.9)
+MASK_SUPERSAMPLE = 4
+
 # Default settings
 DEFAULT_SETTINGS = {
     "font_size": 46,
@@ -46,8 +77,25 @@ DEFAULT_SETTINGS = {
     "run_on_startup": False,
     "window_x": 50,
     "window_y": 50,
-    "window_size": "medium",  # small, medium, large
-    "current_bg_url": ""      # Store current background to prevent reloading
+    "window_size": "medium",  # small, medium, large, custom
+    "window_width": 480,      # used when window_size is custom
+    "dpi_scale": "auto",      # auto or a factor like 1.5
+    "current_bg_url": "",     # Store current background to prevent reloading
+    "font_subsetting": True,  # load the clock digits from a small digits-only copy of the font (needs fontTools)
+    "memory_budget_mb": 0,    # 0 = unlimited; otherwise caches are evicted to stay under this
+    "procedural_backgrounds": True,  # include generated backgrounds in the ↻ rotation
+    "background_providers": [],  # [{"type": "urls" | "folder" | "procedural" | "script", ...}], empty = built-in
+    "provider_script": "",    # Python file adding a script provider to the built-in rotation
+    "crossfade_backgrounds": True,
+    "crossfade_duration_ms": 600,
+    "auto_contrast": False,   # pick digit styling from the background behind the digits
+    "contrast_style": "outline",  # color (light/dark digits), outline, shadow
+    "display_mode": "seconds",  # seconds, minutes (low power HH:MM), auto (minutes on battery or idle)
+    "clock_mode": "clock",    # clock, stopwatch, countdown, world
+    "world_zones": ["America/New_York", "Europe/London", "Asia/Tokyo"],
+    "time_server": "",        # SNTP host[:port] to correct the displayed time against; empty = system clock
+    "timer_precision": "tenths",  # tenths, hundredths
+    "countdown_seconds": 300
 }
 
 # Social Media Links (Replace with your actual links)
@@ -58,13 +106,89 @@ SOCIAL_LINKS = {
     "github": "https://github.com/iVeejay"
 }
 
+# Timer modes: digits after the seconds for each precision
+CLOCK_MODES = ["clock", "stopwatch", "countdown", "world"]
+TIMER_PRECISIONS = {"tenths": 10, "hundredths": 100}
+TIMER_REPORT_INTERVAL = 10.0  # seconds between dropped-frame reports while a timer runs
+
+# World clock: one row per zone, paged when they don't fit the window
+WORLD_BAND = (0.1, 0.74)         # fraction of the height the rows may use (the mask narrows below)
+WORLD_ROW_MIN_HEIGHT = 28        # at the 480x270 base size
+WORLD_LABEL_SCALE = 0.55         # city label size relative to the digits
+WORLD_PAGE_SECONDS = 10
+ZONE_SCAN_STEP = 7 * 86400       # transitions are searched week by week, then bisected to the second
+ZONE_SCAN_HORIZON = 400 * 86400
+TWO_DIGITS = [f"{value:02d}" for value in range(60)]
+
+# Time source: wall clock anchored to the monotonic clock, corrected by slewing toward a reference
+TIME_SLEW_MS_PER_SECOND = 50     # corrections are applied at most this fast (a 0.5 s offset takes 10 s)
+TIME_STEP_THRESHOLD_MS = 10_000  # larger differences are deliberate clock changes and are stepped
+TIME_SAMPLES = 8                 # the least-delayed of the recent samples sets the offset
+TIME_SYSTEM_POLL_INTERVAL = 10.0 # seconds between system-clock checks
+TIME_SNTP_POLL_INTERVAL = 64.0   # seconds between SNTP queries
+TIME_SNTP_TIMEOUT = 1.0
+TICK_BOUNDARY_MARGIN_MS = 5      # ticks land this long after a second boundary
+NTP_EPOCH_OFFSET = 2208988800    # seconds from 1900-01-01 (NTP) to 1970-01-01 (Unix)
+
+# Low-power display: HH:MM only, one wakeup per minute boundary
+DISPLAY_MODES = ["seconds", "minutes", "auto"]
+LOW_POWER_IDLE_SECONDS = 300     # auto mode: no input for this long counts as idle
+POWER_CHECK_INTERVAL = 30.0      # seconds between battery / idle checks in seconds mode
+LOW_POWER_TIME_POLL_INTERVAL = 60.0  # minutes mode: the time reference is checked at most once a minute
+
+# Online background rotation
+IMG_URLS = [
+    "https://picsum.photos/800/600",
+    "https://loremflickr.com/800/600/nature", 
+    "https://picsum.photos/seed/pic1/800/600",
+]
+
+# Procedural backgrounds (no network needed): procedural://<kind>/<seed>
+PROCEDURAL_SCHEME = "procedural://"
+PROCEDURAL_KINDS = ["gradient", "noise", "palette"]
+PROCEDURAL_CACHE_SIZE = 8
+PROCEDURAL_PALETTE_PERIOD = 6 * 3600  # seconds for the palette hue to go once around the color wheel
+
+# Background providers
+PROVIDER_BATCH_COST = 4.0      # a ↻ fetches backups alongside the chosen provider up to this total cost
+PROVIDER_READY_MAX = 2         # successful backups kept for a later ↻
+PROVIDER_LATENCY_ALPHA = 0.3   # weight of the newest sample in the latency average
+PROVIDER_SLOW_SECONDS = 2.0    # a provider this slow is picked half as often as an instant one
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp")
+
+# Background crossfade
+CROSSFADE_FPS = 30
+CROSSFADE_BUDGET_FRACTION = 0.5  # share of a frame interval one blend (or canvas paste) may take
+CROSSFADE_TIMEOUT_FACTOR = 2.0   # give up and cut to the new background after this many durations
+
+# Auto contrast: analysed once per background from the area behind the digits
+CONTRAST_STYLES = ["color", "outline", "shadow"]
+CONTRAST_SAMPLE_SIZE = 48  # the digit band is box-downsampled to about this many pixels high
+CONTRAST_BINS = 64
+CONTRAST_TARGET = 3.0      # WCAG minimum for large text; below it outline / shadow styles add an edge
+CONTRAST_LIGHT = "#FFFFFF"
+CONTRAST_DARK = "#111111"
+CONTRAST_CACHE_SIZE = 32
+
+# UI-thread dispatcher: every cross-thread request (tray, workers) is queued and run on the Tk thread
+UI_QUEUE_SIZE = 256
+UI_DRAIN_INTERVAL_MS = 50  # cadence only while calls are pending; an idle queue never wakes the Tk thread
+UI_LATENCY_SAMPLES = 1024
+BACKGROUND_WORKERS = 2
+
+# Frame streaming (headless output for OBS / signage)
+STREAM_HOST = "127.0.0.1"
+STREAM_PORT = 8765
+STREAM_MATTE = "#000000"  # JPEG has no alpha, masked-out area is filled with this
+STREAM_PNG_MAX_FRAMES = 3600  # PNG sequence is a ring of this many files (one hour at 1 fps)
+
 # Settings window colors - ONLY these two colors are used
 SETTINGS_BG = "#2d2d2d"
 SETTINGS_FG = "#ffffff"
 
 class SettingsManager:
-    def __init__(self):
-        self.settings_file = os.path.join(BASE_DIR, "settings.json")
+    def __init__(self, settings_file=None):
+        self.settings_file = settings_file or os.path.join(BASE_DIR, "settings.json")
         self.settings = self.load_settings()
     
     def load_settings(self):
@@ -75,8 +199,10 @@ class SettingsManager:
                     # Merge with defaults, preserving current_bg_url if it exists
                     result = {**DEFAULT_SETTINGS, **loaded_settings}
                     # Ensure window_size is valid
-                    if result["window_size"] not in SIZE_PRESETS:
+                    if result["window_size"] not in SIZE_PRESETS and result["window_size"] != "custom":
                         result["window_size"] = "medium"
+                    if result["contrast_style"] not in CONTRAST_STYLES:
+                        result["contrast_style"] = DEFAULT_SETTINGS["contrast_style"]
                     return result
         except:
             pass
@@ -98,9 +224,1571 @@ class SettingsManager:
         self.settings[key] = value
         self.save_settings()
 
-class SecClock:
+def estimate_nbytes(value):
+    """Approximate pixel / buffer memory held by a cached value"""
+    if isinstance(value, Image.Image):
+        # PIL stores every multi-band mode with 4 bytes per pixel
+        return value.width * value.height * (4 if len(value.getbands()) > 1 else 1)
+    if isinstance(value, ImageTk.PhotoImage):
+        return value.width() * value.height() * 4
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, ImageFont.FreeTypeFont):
+        try:
+            return os.path.getsize(value.path)
+        except (OSError, TypeError):
+            return 0
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(v) for v in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_nbytes(v) for v in value)
+    return 0
+
+def process_rss_bytes():
+    """Resident set size of this process (working set on Windows), or None if unavailable"""
+    try:
+        import win32process
+        return win32process.GetProcessMemoryInfo(win32api.GetCurrentProcess())["WorkingSetSize"]
+    except Exception:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+class MemoryBudget:
+    """Tracks bytes per category; when over budget, releases the largest releasable entries first"""
+    def __init__(self, budget_bytes=0):
+        self.budget_bytes = budget_bytes
+        self.entries = {}  # (category, key) -> (nbytes, release callback or None when pinned)
+        self.pins = {}     # (category, key) -> count: releasable entries that are in use right now
+        self.lock = threading.Lock()
+        self.evictions = 0
+    
+    @property
+    def limited(self):
+        return self.budget_bytes > 0
+    
+    def configure(self, budget_mb):
+        self.budget_bytes = int(float(budget_mb or 0) * 1024 * 1024)
+        self.enforce()
+    
+    def track(self, category, key, nbytes, release=None):
+        with self.lock:
+            self.entries[(category, key)] = (nbytes, release)
+        self.enforce()
+    
+    def untrack(self, category, key):
+        with self.lock:
+            self.entries.pop((category, key), None)
+    
+    def pin(self, category, key):
+        """Still counted, but not released while pinned: releasing an entry in use frees nothing"""
+        with self.lock:
+            self.pins[(category, key)] = self.pins.get((category, key), 0) + 1
+    
+    def unpin(self, category, key):
+        with self.lock:
+            count = self.pins.pop((category, key), 0) - 1
+            if count > 0:
+                self.pins[(category, key)] = count
+    
+    def total(self):
+        with self.lock:
+            return sum(nbytes for nbytes, _ in self.entries.values())
+    
+    def enforce(self):
+        if not self.limited:
+            return
+        with self.lock:
+            total = sum(nbytes for nbytes, _ in self.entries.values())
+            if total <= self.budget_bytes:
+                return
+            victims = []
+            releasable = sorted(
+                ((nbytes, entry, release) for entry, (nbytes, release) in self.entries.items()
+                 if release and entry not in self.pins),
+                key=lambda victim: victim[0], reverse=True
+            )
+            for nbytes, entry, release in releasable:
+                if total <= self.budget_bytes:
+                    break
+                del self.entries[entry]
+                total -= nbytes
+                victims.append((entry, release))
+            self.evictions += len(victims)
+        # Release outside the lock: callbacks take their cache's own lock
+        for entry, release in victims:
+            try:
+                release()
+            except Exception as e:
+                print(f"Memory budget release of {entry} failed: {e}")
+    
+    def report(self):
+        mb = 1024 * 1024
+        with self.lock:
+            by_category = {}
+            for (category, _), (nbytes, _) in self.entries.items():
+                count_bytes = by_category.setdefault(category, [0, 0])
+                count_bytes[0] += 1
+                count_bytes[1] += nbytes
+        rss = process_rss_bytes()
+        tracked = sum(nbytes for _, nbytes in by_category.values())
+        budget = f"{self.budget_bytes / mb:.1f} MB budget" if self.limited else "no budget"
+        lines = [f"RSS {rss / mb:.1f} MB" if rss else "RSS unavailable",
+                 f"Tracked {tracked / mb:.2f} MB ({budget}, {len(self.pins)} in use, {self.evictions} evictions)"]
+        for category, (count, nbytes) in sorted(by_category.items(), key=lambda item: -item[1][1]):
+            lines.append(f"  {category:<20} {nbytes / mb:7.2f} MB  ({count})")
+        return "\n".join(lines)
+
+MEMORY_BUDGET = MemoryBudget()
+
+class LRUCache:
+    """Small thread-safe LRU keyed by hashable tuples, bounded by entry count and the memory budget
+    
+    release_via(fn, key) runs budget evictions elsewhere: the memory budget may be enforced from any
+    thread, and a cache of Tk images must only drop them on the Tk thread."""
+    def __init__(self, maxsize, category=None, budget=MEMORY_BUDGET, release_via=None):
+        self.maxsize = maxsize
+        self.category = category  # None: use the first element of each key
+        self.budget = budget
+        self.release_via = release_via
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key, default=None):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return default
+    
+    def put(self, key, value):
+        evicted = []
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                evicted.append(self.entries.popitem(last=False)[0])
+        if self.budget:
+            for old_key in evicted:
+                self.budget.untrack(self._category(old_key), old_key)
+            if self.release_via:
+                release = partial(self.release_via, self.discard, key)
+            else:
+                release = partial(self.discard, key)
+            self.budget.track(self._category(key), key, estimate_nbytes(value), release)
+    
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+        if self.budget:
+            self.budget.untrack(self._category(key), key)
+    
+    def pin(self, key):
+        if self.budget:
+            self.budget.pin(self._category(key), key)
+    
+    def unpin(self, key):
+        if self.budget:
+            self.budget.unpin(self._category(key), key)
+    
+    def clear(self):
+        with self.lock:
+            keys = list(self.entries)
+            self.entries.clear()
+        if self.budget:
+            for key in keys:
+                self.budget.untrack(self._category(key), key)
+    
+    def _category(self, key):
+        if self.category:
+            return self.category
+        return key[0] if isinstance(key, tuple) and key else "cache"
+
+MASK_CACHE = LRUCache(MASK_CACHE_SIZE, category="masks")
+
+class FontService:
+    """FreeType faces cached per size, optionally parsed from a persisted digits-only subset of the font"""
+    def __init__(self, path=FONT_PATH, cache_dir=FONT_CACHE_DIR):
+        self.path = path
+        self.cache_dir = cache_dir
+        self.faces = LRUCache(FONT_CACHE_SIZE, category="fonts")
+        self.subset = None
+        self.subset_failed = font_subset is None
+        self.loads = []  # (file, size, seconds) for every face actually parsed
+    
+    def subset_file(self):
+        """Path of the digit subset, built with fontTools on first use; None when unavailable"""
+        if self.subset or self.subset_failed:
+            return self.subset
+        try:
+            stat = os.stat(self.path)
+            stem, ext = os.path.splitext(os.path.basename(self.path))
+            # Named after the source's size and mtime, so a replaced font gets a fresh subset
+            subset_path = os.path.join(self.cache_dir, f"{stem}-digits-{stat.st_size:x}-{stat.st_mtime_ns:x}{ext}")
+            if not os.path.exists(subset_path):
+                started = time.perf_counter()
+                os.makedirs(self.cache_dir, exist_ok=True)
+                options = font_subset.Options()
+                options.notdef_outline = True
+                font = font_subset.load_font(self.path, options)
+                subsetter = font_subset.Subsetter(options)
+                subsetter.populate(text=FONT_SUBSET_TEXT)
+                subsetter.subset(font)
+                temp_path = subset_path + ".tmp"
+                font_subset.save_font(font, temp_path, options)
+                os.replace(temp_path, subset_path)
+                print(f"Font subset built: {subset_path} ({os.path.getsize(subset_path)} bytes, "
+                      f"{(time.perf_counter() - started) * 1000:.0f} ms)")
+            self.subset = subset_path
+        except Exception as e:
+            print(f"Font subsetting failed, using the full font: {e}")
+            self.subset_failed = True
+        return self.subset
+    
+    def face(self, size, digits_only=False):
+        """Font at a pixel size. A digits_only face can only draw FONT_SUBSET_TEXT"""
+        path = (self.subset_file() if digits_only else None) or self.path
+        font = self.faces.get((path, size))
+        if font is None:
+            started = time.perf_counter()
+            font = ImageFont.truetype(path, size)
+            elapsed = time.perf_counter() - started
+            self.faces.put((path, size), font)
+            self.loads.append((os.path.basename(path), size, elapsed))
+            print(f"Font loaded: {path}, Size: {size} ({elapsed * 1000:.2f} ms)")
+        return font
+    
+    def mark(self):
+        return len(self.loads)
+    
+    def load_time_since(self, mark):
+        """Seconds spent parsing faces since mark()"""
+        return sum(seconds for _, _, seconds in self.loads[mark:])
+
+FONT_SERVICE = FontService()
+
+def window_size_for(width, scale=1.0):
+    """Window size for a base width and DPI scale, keeping the 480x270 ratio"""
+    width = max(MIN_WINDOW_WIDTH, min(MAX_WINDOW_WIDTH, int(round(width * scale))))
+    return (width, int(width * BASE_SIZE[1] / BASE_SIZE[0] + 0.5))
+
+def base_width_for(settings):
+    """Unscaled window width from the window_size preset or the custom width"""
+    preset = settings.get("window_size")
+    if preset in SIZE_PRESETS:
+        return SIZE_PRESETS[preset][0]
+    return int(settings.get("window_width"))
+
+def scaled(value, size):
+    """Scale a metric specified at BASE_SIZE to a window of the given size"""
+    return max(1, int(round(value * size[0] / BASE_SIZE[0])))
+
+def load_mask(size):
+    """Mask for a window size, generated from the one fitted curve (presets included)"""
+    mask = MASK_CACHE.get(size)
+    if mask is not None:
+        return mask
+    mask = create_dynamic_mask(size)
+    MASK_CACHE.put(size, mask)
+    return mask
+
+def create_dynamic_mask(size):
+    """Generate the clock mask at any resolution, antialiased by supersampling"""
+    width, height = size
+    ss = MASK_SUPERSAMPLE
+    w, h = width * ss, height * ss
+    top = MASK_CURVE_TOP * h
+    bottom = MASK_CURVE_BOTTOM * h
+    p, q = MASK_CURVE_EXPONENTS
+    
+    # Right edge from the start of the curve down to the flat bottom, mirrored for the left edge
+    steps = max(16, int(bottom - top) // ss)
+    right = []
+    for i in range(steps + 1):
+        t = i / steps
+        half = MASK_BOTTOM_HALF_WIDTH + (1 - MASK_BOTTOM_HALF_WIDTH) * (1 - t ** q) ** (1 / p)
+        right.append((w / 2 + half * w / 2, top + t * (bottom - top)))
+    left = [(w - x, y) for x, y in reversed(right)]
+    
+    mask = Image.new("L", (w, h), 0)
+    draw = ImageDraw.Draw(mask)
+    draw.polygon([(0, 0), (w, 0)] + right + left, fill=255)
+    
+    print(f"Generated mask for size {size}")
+    return mask.resize(size, Image.BOX)
+
+def text_edge_width(font):
+    """Outline width / shadow offset for a font, growing with its size"""
+    return max(1, getattr(font, "size", 46) // 24)
+
+def render_text_image(text, font, color, fixed_width=None, outline=None, shadow=None):
+    """Render text centered on a transparent RGBA image (shared by the window and headless output)"""
+    edge = text_edge_width(font)
+    stroke = edge if outline else 0
+    # Room for the outline and the blurred, offset shadow
+    extra = 2 * stroke + (4 * edge if shadow else 0)
+    
+    # Create a temporary image to measure text size
+    temp_img = Image.new("RGB", (1, 1))
+    temp_draw = ImageDraw.Draw(temp_img)
+    
+    if font:
+        bbox = temp_draw.textbbox((0, 0), text, font=font, stroke_width=stroke)
+        text_width = bbox[2] - bbox[0] + 20 + extra  # More padding
+        text_height = bbox[3] - bbox[1] + 20 + extra
+    else:
+        # Fallback if font is None
+        text_width = 60
+        text_height = 60
+    
+    if fixed_width:
+        text_width = fixed_width
+    
+    # Create transparent image for text
+    text_img = Image.new("RGBA", (text_width, text_height), (0, 0, 0, 0))
+    text_draw = ImageDraw.Draw(text_img)
+    center = (text_width // 2, text_height // 2)
+    if not font:
+        # Fallback: use default font
+        font = ImageFont.load_default()
+    
+    # Draw text centered
+    text_draw.text(center, text, fill=color, font=font, anchor="mm",
+                   stroke_width=stroke, stroke_fill=outline)
+    
+    if shadow:
+        shadow_img = Image.new("RGBA", text_img.size, (0, 0, 0, 0))
+        ImageDraw.Draw(shadow_img).text((center[0] + edge, center[1] + edge), text, fill=shadow, font=font, anchor="mm")
+        text_img = Image.alpha_composite(shadow_img.filter(ImageFilter.GaussianBlur(edge)), text_img)
+    
+    return text_img
+
+def layout_separated_clock(widths, size):
+    """Return the x center of each clock part, laid out side by side around the window center"""
+    current_x = size[0] // 2 - sum(widths) // 2
+    centers = []
+    for width in widths:
+        centers.append(current_x + width // 2)
+        current_x += width
+    return centers
+
+# sRGB channel value -> linear light, for WCAG relative luminance
+SRGB_TO_LINEAR = np.where(
+    np.arange(256) / 255.0 <= 0.04045,
+    np.arange(256) / 255.0 / 12.92,
+    ((np.arange(256) / 255.0 + 0.055) / 1.055) ** 2.4
+).astype(np.float32)
+
+def color_luminance(color):
+    r, g, b = ImageColor.getrgb(color)[:3]
+    return float(0.2126 * SRGB_TO_LINEAR[r] + 0.7152 * SRGB_TO_LINEAR[g] + 0.0722 * SRGB_TO_LINEAR[b])
+
+def contrast_ratio(luminance_a, luminance_b):
+    return (max(luminance_a, luminance_b) + 0.05) / (min(luminance_a, luminance_b) + 0.05)
+
+def digit_region(font, size, band=None):
+    """Box behind HH:MM:SS, estimated from the font so it is known before any glyph is rendered.
+    
+    band (top, bottom as fractions of the height) is the area several world-clock rows share instead"""
+    if band:
+        return (0, int(size[1] * band[0]), size[0], int(size[1] * band[1]))
+    font_px = getattr(font, "size", None) or scaled(DEFAULT_SETTINGS["font_size"], size)
+    try:
+        width = int(font.getlength("00:00:00"))
+    except Exception:
+        width = font_px * 4
+    half_width = min(size[0], width + font_px) // 2
+    half_height = min(size[1], int(font_px * 1.5)) // 2
+    center_x, center_y = size[0] // 2, size[1] // 2
+    return (center_x - half_width, center_y - half_height, center_x + half_width, center_y + half_height)
+
+def analyse_digit_contrast(image, region, font_color, contrast_style):
+    """(color, outline, shadow) for the digits, from a luminance histogram of the visible pixels behind them"""
+    band = image.crop(region)
+    factor = max(1, band.height // CONTRAST_SAMPLE_SIZE)
+    if factor > 1:
+        band = band.reduce(factor)
+    pixels = np.asarray(band.convert("RGBA"))
+    visible = pixels[..., 3] > 127  # masked-out corners are not behind the digits
+    if not visible.any():
+        return (font_color, None, None)
+    luminance = (0.2126 * SRGB_TO_LINEAR[pixels[..., 0]] + 0.7152 * SRGB_TO_LINEAR[pixels[..., 1]]
+                 + 0.0722 * SRGB_TO_LINEAR[pixels[..., 2]])[visible]
+    histogram, _ = np.histogram(luminance, bins=CONTRAST_BINS, range=(0.0, 1.0))
+    cumulative = np.cumsum(histogram) / luminance.size
+    dark, median, bright = ((np.searchsorted(cumulative, share) + 0.5) / CONTRAST_BINS for share in (0.1, 0.5, 0.9))
+    
+    if contrast_style == "color":
+        light_lum, dark_lum = color_luminance(CONTRAST_LIGHT), color_luminance(CONTRAST_DARK)
+        if contrast_ratio(light_lum, median) >= contrast_ratio(dark_lum, median):
+            return (CONTRAST_LIGHT, None, None)
+        return (CONTRAST_DARK, None, None)
+    
+    # Outline / shadow keep the chosen color and only add an edge where the background fights it
+    digit_lum = color_luminance(font_color)
+    if min(contrast_ratio(digit_lum, dark), contrast_ratio(digit_lum, bright)) >= CONTRAST_TARGET:
+        return (font_color, None, None)
+    # Above ~0.18 luminance black contrasts more with the digits than white does
+    edge = "#000000" if digit_lum > 0.18 else "#FFFFFF"
+    if contrast_style == "shadow":
+        return (font_color, None, edge)
+    return (font_color, edge, None)
+
+CONTRAST_CACHE = LRUCache(CONTRAST_CACHE_SIZE, category="contrast")
+
+def cached_digit_style(source, image, font, font_color, contrast_style, band=None, refresh=False):
+    """Digit style for a background, analysed once and reused on reloads and resizes back to a size"""
+    region = digit_region(font, image.size, band)
+    key = (source, image.size, region, font_color, contrast_style)
+    style = None if refresh else CONTRAST_CACHE.get(key)
+    if style is None:
+        started = time.perf_counter()
+        style = analyse_digit_contrast(image, region, font_color, contrast_style)
+        CONTRAST_CACHE.put(key, style)
+        print(f"Auto contrast {style} in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return style
+
+def procedural_source(kind, seed=None):
+    """Source string for a generated background; a new seed (time based, so palettes drift) if none given"""
+    if seed is None:
+        seed = time.time_ns() // 1_000_000
+    return f"{PROCEDURAL_SCHEME}{kind}/{seed}"
+
+def is_procedural(source):
+    return bool(source) and source.startswith(PROCEDURAL_SCHEME)
+
+def _palette_for_seed(seed, rng, stops=4):
+    """Dark, harmonious color stops whose base hue drifts slowly with the (time based) seed"""
+    base_hue = (seed / 1000.0 / PROCEDURAL_PALETTE_PERIOD) % 1.0
+    spread = rng.uniform(0.06, 0.22)
+    colors = []
+    for i in range(stops):
+        hue = (base_hue + spread * i + rng.uniform(-0.02, 0.02)) % 1.0
+        saturation = rng.uniform(0.45, 0.85)
+        value = rng.uniform(0.22, 0.6)  # keep it dark enough for white digits
+        colors.append(colorsys.hsv_to_rgb(hue, saturation, value))
+    return np.array(colors, dtype=np.float32) * 255.0
+
+def _apply_palette(t, colors):
+    """Map a float field in [0, 1] through the color stops via a 256-entry lookup table"""
+    segments = len(colors) - 1
+    position = np.linspace(0.0, segments, 256, dtype=np.float32)
+    index = np.minimum(position.astype(np.int32), segments - 1)
+    fraction = (position - index)[:, None]
+    lut = (colors[index] * (1.0 - fraction) + colors[index + 1] * fraction).astype(np.uint8)
+    return lut[(np.clip(t, 0.0, 1.0) * np.float32(255.0)).astype(np.uint8)]
+
+def _value_noise(rng, size, cells):
+    """One octave of smooth value noise: a random coarse grid upsampled bicubically"""
+    width, height = size
+    grid_w = max(2, cells)
+    grid_h = max(2, int(round(cells * height / width)))
+    grid = Image.fromarray((rng.random((grid_h, grid_w)) * 255).astype(np.uint8), "L")
+    return np.asarray(grid.resize(size, Image.BICUBIC), dtype=np.float32) / 255.0
+
+PROCEDURAL_CACHE = LRUCache(PROCEDURAL_CACHE_SIZE, category="procedural")
+
+def generate_procedural_background(kind, seed, size):
+    """Generate a gradient, noise field or palette plasma image with NumPy (a few ms at window sizes)"""
+    key = (kind, seed, size)
+    cached = PROCEDURAL_CACHE.get(key)
+    if cached is not None:
+        return cached
+    
+    width, height = size
+    rng = np.random.default_rng(seed)
+    colors = _palette_for_seed(seed, rng)
+    y = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+    x = np.linspace(0.0, width / height, width, dtype=np.float32)[None, :]
+    
+    if kind == "gradient":
+        angle = rng.uniform(0, 2 * np.pi)
+        t = x * np.float32(np.cos(angle)) + y * np.float32(np.sin(angle))
+        t = (t - t.min()) / max(float(t.max() - t.min()), 1e-6)
+        # Soft radial glow on top of the linear ramp
+        cx, cy = rng.uniform(0.2, 0.8) * width / height, rng.uniform(0.2, 0.8)
+        t = t + 0.25 * np.exp(-((x - cx) ** 2 + (y - cy) ** 2) * 4.0)
+    elif kind == "noise":
+        t = np.zeros((height, width), dtype=np.float32)
+        amplitude, total = 1.0, 0.0
+        for octave in range(4):
+            t += amplitude * _value_noise(rng, size, 4 * 2 ** octave)
+            total += amplitude
+            amplitude *= 0.5
+        t /= total
+        t = (t - t.min()) / max(float(t.max() - t.min()), 1e-6)
+    elif kind == "palette":
+        f = rng.uniform(2.0, 7.0, 4).astype(np.float32)
+        p = rng.uniform(0, 2 * np.pi, 4).astype(np.float32)
+        cx, cy = rng.uniform(0, width / height), rng.uniform(0, 1)
+        t = (np.sin(x * f[0] + p[0]) + np.sin(y * f[1] + p[1])
+             + np.sin((x + y) * f[2] + p[2]) + np.sin(np.sqrt((x - cx) ** 2 + (y - cy) ** 2) * f[3] * 2 + p[3]))
+        t = t * np.float32(0.125) + np.float32(0.5)
+    else:
+        raise ValueError(f"Unknown procedural background kind: {kind}")
+    
+    im = Image.fromarray(_apply_palette(t, colors), "RGB")
+    PROCEDURAL_CACHE.put(key, im)
+    return im
+
+def open_image_source(source, size=BASE_SIZE):
+    """Open a background source (http(s) URL, procedural:// or local path) as an RGB image"""
+    if is_procedural(source):
+        kind, _, seed = source[len(PROCEDURAL_SCHEME):].partition("/")
+        return generate_procedural_background(kind, int(seed or 0), size)
+    if source.startswith(("http://", "https://")):
+        print(f"Downloading background: {source}")
+        r = requests.get(source, timeout=10)
+        r.raise_for_status()
+        data = io.BytesIO(r.content)
+    else:
+        print(f"Loading local image: {source}")
+        data = source
+    with Image.open(data) as im:
+        if MEMORY_BUDGET.limited:
+            # Strict memory mode: let JPEG decode at a reduced scale close to the window size
+            im.draft("RGB", size)
+        return im.convert("RGB")
+
+def prepare_background(im, size):
+    """Resize an RGB image to the window and apply the mask for that size"""
+    if im.size != size:
+        im = im.resize(size, Image.LANCZOS)
+    
+    # Load the appropriate mask for current size
+    mask = load_mask(size)
+    im_rgba = im.convert("RGBA")
+    
+    # Apply mask
+    im_rgba.putalpha(mask)
+    return im_rgba
+
+class ProviderStats:
+    """Success rate and latency of one background provider, updated from worker threads"""
+    def __init__(self, latency_hint):
+        self.attempts = 0
+        self.successes = 0
+        self.latency = latency_hint  # running average, seeded from the hint until measured
+        self.measured = False
+        self.last_error = None
+        self.lock = threading.Lock()
+    
+    def record(self, elapsed, error=None):
+        with self.lock:
+            self.attempts += 1
+            if error is None:
+                self.successes += 1
+            else:
+                self.last_error = str(error)
+            # Failures count too: a provider that times out is slow
+            if self.measured:
+                self.latency += PROVIDER_LATENCY_ALPHA * (elapsed - self.latency)
+            else:
+                self.latency = elapsed
+                self.measured = True
+    
+    @property
+    def health(self):
+        # Smoothed so a new provider starts at 0.5 and one failure doesn't rule it out
+        return (self.successes + 1) / (self.attempts + 2)
+    
+    def report(self, name):
+        with self.lock:
+            line = (f"{name:<12} {self.successes}/{self.attempts} ok, "
+                    f"{'latency' if self.measured else 'expected'} {self.latency * 1000:.0f} ms")
+            if self.last_error and self.successes < self.attempts:
+                line += f", last error: {self.last_error}"
+        return line
+
+class BackgroundProvider:
+    """A source of backgrounds for the ↻ rotation.
+    
+    Subclasses implement list_sources() and, if their sources aren't plain URLs or paths, open().
+    cost (relative expense of one fetch) decides what is fetched as a backup; latency_hint (seconds)
+    steers selection until measured latency replaces it. priority scales how often it is picked."""
+    default_name = "provider"
+    cost = 1.0
+    latency_hint = 0.5
+    refresh = False  # True when a source gives a different image on every fetch (random-image URLs)
+    
+    def __init__(self, name=None, cost=None, latency_hint=None, priority=1.0):
+        self.name = name or self.default_name
+        if cost is not None:
+            self.cost = float(cost)
+        if latency_hint is not None:
+            self.latency_hint = float(latency_hint)
+        self.priority = float(priority)
+        self.stats = ProviderStats(self.latency_hint)
+        self.sources = []
+        self.index = 0
+    
+    def list_sources(self):
+        raise NotImplementedError
+    
+    def open(self, source, size):
+        """RGB image for a source (worker thread)"""
+        return open_image_source(source, size)
+    
+    def resolve(self, source):
+        """Concrete source for a listed one (generated sources get a seed)"""
+        return source
+    
+    def next_source(self):
+        """Next source in this provider's cycle; the list is re-read each time around (Tk thread)"""
+        if self.index >= len(self.sources):
+            self.sources = list(self.list_sources())
+            self.index = 0
+            if not self.sources:
+                raise LookupError(f"{self.name}: no backgrounds")
+        source = self.sources[self.index]
+        self.index += 1
+        return self.resolve(source)
+    
+    def owns(self, source):
+        """Whether a saved current background came from this provider"""
+        if not self.sources:
+            try:
+                self.sources = list(self.list_sources())
+            except Exception:
+                return False
+        return source in self.sources
+    
+    def fetch(self, source, size):
+        """open() timed into this provider's statistics"""
+        started = time.perf_counter()
+        try:
+            im = self.open(source, size)
+        except Exception as e:
+            self.stats.record(time.perf_counter() - started, e)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return im
+    
+    def weight(self):
+        """Selection weight: healthy, fast providers are picked more often, failing ones are still probed"""
+        return self.priority * self.stats.health ** 2 / (1.0 + self.stats.latency / PROVIDER_SLOW_SECONDS)
+
+class UrlListProvider(BackgroundProvider):
+    """HTTP(S) image URLs; by default each fetch is expected to return a new picture"""
+    default_name = "online"
+    cost = 3.0
+    latency_hint = 1.0
+    
+    def __init__(self, urls=None, refresh=True, **hints):
+        super().__init__(**hints)
+        self.urls = list(urls or IMG_URLS)
+        self.refresh = refresh
+    
+    def list_sources(self):
+        return self.urls
+
+class FolderProvider(BackgroundProvider):
+    """Images in a local folder (or a single image file)"""
+    default_name = "folder"
+    cost = 1.0
+    latency_hint = 0.05
+    
+    def __init__(self, path, **hints):
+        super().__init__(**hints)
+        self.path = path
+    
+    def list_sources(self):
+        if os.path.isfile(self.path):
+            return [self.path]
+        return sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+
+class ProceduralProvider(BackgroundProvider):
+    """Generated backgrounds, a fresh seed on every fetch; never needs the network"""
+    default_name = "generated"
+    cost = 0.5
+    latency_hint = 0.01
+    
+    def __init__(self, kinds=None, **hints):
+        super().__init__(**hints)
+        self.kinds = [kind for kind in (kinds or PROCEDURAL_KINDS) if kind in PROCEDURAL_KINDS]
+    
+    def list_sources(self):
+        return [PROCEDURAL_SCHEME + kind for kind in self.kinds]
+    
+    def resolve(self, source):
+        return procedural_source(source[len(PROCEDURAL_SCHEME):])
+    
+    def owns(self, source):
+        return is_procedural(source) and source[len(PROCEDURAL_SCHEME):].partition("/")[0] in self.kinds
+
+class ScriptProvider(BackgroundProvider):
+    """A user Python script defining sources() (URLs, paths or its own ids) and optionally
+    fetch(source, size) returning a PIL image. COST, LATENCY_HINT and REFRESH globals are read as hints."""
+    def __init__(self, path, **hints):
+        spec = importlib.util.spec_from_file_location("secclock_provider_" + os.path.splitext(os.path.basename(path))[0], path)
+        self.module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.module)
+        hints.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+        hints.setdefault("cost", getattr(self.module, "COST", None))
+        hints.setdefault("latency_hint", getattr(self.module, "LATENCY_HINT", None))
+        super().__init__(**hints)
+        self.refresh = bool(getattr(self.module, "REFRESH", False))
+    
+    def list_sources(self):
+        return self.module.sources()
+    
+    def open(self, source, size):
+        fetch = getattr(self.module, "fetch", None)
+        if fetch is None:
+            return super().open(source, size)
+        return fetch(source, size).convert("RGB")
+
+# "type" in a background_providers entry -> class; the other keys are passed to it
+PROVIDER_TYPES = {
+    "urls": UrlListProvider,
+    "folder": FolderProvider,
+    "procedural": ProceduralProvider,
+    "script": ScriptProvider,
+}
+
+def build_providers(settings):
+    """Providers for the ↻ rotation. A custom image replaces the rotation, as before"""
+    custom_bg = settings.get("custom_bg_image")
+    if custom_bg and os.path.exists(custom_bg):
+        print(f"Custom background loaded: {custom_bg}")
+        return [FolderProvider(custom_bg, name="custom")]
+    specs = settings.get("background_providers") or [{"type": "urls", "urls": IMG_URLS}, {"type": "procedural"}]
+    if settings.get("provider_script"):
+        specs = specs + [{"type": "script", "path": settings.get("provider_script")}]
+    providers = []
+    for spec in specs:
+        kind = None
+        try:
+            # A malformed entry (e.g. a bare URL string) is skipped like any other unusable provider
+            spec = dict(spec)
+            kind = spec.pop("type", None)
+            if kind == "procedural" and not settings.get("procedural_backgrounds"):
+                continue
+            providers.append(PROVIDER_TYPES[kind](**spec))
+        except Exception as e:
+            print(f"Background provider {kind!r} unavailable: {e}")
+    if not providers:
+        providers.append(ProceduralProvider())
+    print("Background providers: " + ", ".join(provider.name for provider in providers))
+    return providers
+
+def build_rotation(settings):
+    # A custom image has no fallback (as before); otherwise generated backgrounds cover being offline
+    custom_bg = settings.get("custom_bg_image")
+    fallback = None if custom_bg and os.path.exists(custom_bg) else ProceduralProvider(name="offline")
+    return BackgroundRotation(build_providers(settings), fallback)
+
+class BackgroundRotation:
+    """Chooses providers by measured health and latency and fetches from them in batches on worker threads"""
+    def __init__(self, providers, fallback=None, rng=None):
+        self.providers = providers
+        self.fallback = fallback
+        self.random = rng or random.Random()
+        self.ready = deque()  # (size, result) of backups fetched by an earlier ↻
+        self.lock = threading.Lock()
+    
+    def choose(self, exclude=()):
+        candidates = [provider for provider in self.providers if provider not in exclude]
+        if not candidates:
+            return None
+        return self.random.choices(candidates, weights=[provider.weight() for provider in candidates])[0]
+    
+    def locate(self, source):
+        """(provider, source) for startup: the provider that still owns the saved source, else a fresh pick"""
+        for provider in self.providers:
+            if source and provider.owns(source):
+                return provider, source
+        provider = self.choose()
+        return provider, provider.next_source()
+    
+    def _backups(self, primary, size):
+        """Other providers fetched alongside the chosen one, cheapest-to-run first, within the batch cost"""
+        with self.lock:
+            stocked = {result[0] for ready_size, result in self.ready if ready_size == size}
+        backups = []
+        total = primary.cost
+        for provider in sorted(self.providers, key=lambda provider: provider.weight(), reverse=True):
+            if provider is primary or provider in stocked or total + provider.cost > PROVIDER_BATCH_COST:
+                continue
+            backups.append(provider)
+            total += provider.cost
+        return backups
+    
+    def _take_ready(self, provider, size):
+        """A stocked result from provider (None: any provider) at size; stock for other sizes is dropped"""
+        with self.lock:
+            for entry in list(self.ready):
+                ready_size, result = entry
+                if ready_size != size:
+                    self.ready.remove(entry)
+                elif provider is None or result[0] is provider:
+                    self.ready.remove(entry)
+                    return result
+        return None
+    
+    def fetch(self, size, load, executor):
+        """Future of (provider, source, loaded) for the next background.
+        
+        Called on the Tk thread. load(source, refresh, size, opener) runs on the executor. The chosen
+        provider's result wins; backups fill in if it fails, otherwise they are kept for a later ↻"""
+        result = Future()
+        primary = self.choose()
+        ready = self._take_ready(primary, size)
+        if ready:
+            result.set_result(ready)
+            return result
+        jobs = []
+        error = None
+        for provider in [primary] + self._backups(primary, size):
+            try:
+                jobs.append((provider, provider.next_source()))
+            except Exception as e:
+                # Can't list its sources (folder gone or empty, script error): a failed fetch, not a failed ↻
+                print(f"Background provider {provider.name} has no source: {e}")
+                provider.stats.record(0.0, e)
+                error = e
+        fallback_source = None
+        if self.fallback:
+            try:
+                fallback_source = self.fallback.next_source()
+            except Exception as e:
+                self.fallback.stats.record(0.0, e)
+        primary_failed = not jobs or jobs[0][0] is not primary
+        state = {"left": len(jobs), "primary_failed": primary_failed, "backups": [], "settled": False}
+        
+        def all_failed(error):
+            # Everything in the batch failed: a backup stocked by an earlier ↻ beats the fallback
+            stocked = self._take_ready(None, size)
+            if stocked:
+                result.set_result(stocked)
+                return
+            if fallback_source is None:
+                result.set_exception(error)
+                return
+            fallback = executor.submit(load, fallback_source, False, size, self.fallback.fetch)
+            fallback.add_done_callback(
+                lambda done: result.set_exception(done.exception()) if done.exception()
+                else result.set_result((self.fallback, fallback_source, done.result()))
+            )
+        
+        def finished(provider, source, future):
+            error = future.exception()
+            with self.lock:
+                state["left"] -= 1
+                value = None if error else (provider, source, future.result())
+                if error:
+                    print(f"Background provider {provider.name} failed on {source}: {error}")
+                    state["primary_failed"] |= provider is primary
+                elif state["settled"] or provider is not primary:
+                    state["backups"].append(value)
+                    value = None
+                if value is None and state["primary_failed"] and state["backups"] and not state["settled"]:
+                    value = state["backups"].pop(0)
+                settles = value is not None and not state["settled"]
+                state["settled"] |= settles
+                if state["settled"]:
+                    while state["backups"] and len(self.ready) < PROVIDER_READY_MAX:
+                        self.ready.append((size, state["backups"].pop(0)))
+                elif state["left"]:
+                    return
+            # Settled outside the lock: the done-callback submits to the UI dispatcher, and the
+            # Tk thread may be waiting on this lock in _take_ready() meanwhile
+            if settles:
+                result.set_result(value)
+            elif not state["settled"]:
+                all_failed(error)
+        
+        if not jobs:
+            all_failed(error)
+        for provider, source in jobs:
+            job = executor.submit(load, source, provider.refresh, size, provider.fetch)
+            job.add_done_callback(partial(finished, provider, source))
+        return result
+    
+    def clear_ready(self):
+        with self.lock:
+            self.ready.clear()
+    
+    def report(self):
+        lines = [provider.stats.report(provider.name) + f", weight {provider.weight():.2f}" for provider in self.providers]
+        if self.fallback and self.fallback.stats.attempts:
+            lines.append(self.fallback.stats.report(self.fallback.name))
+        return "\n".join(lines)
+
+def get_display_refresh_rate():
+    """Refresh rate of the primary display in Hz (60 if it can't be read)"""
+    try:
+        devmode = win32api.EnumDisplaySettings(None, win32con.ENUM_CURRENT_SETTINGS)
+        if devmode.DisplayFrequency > 1:
+            return devmode.DisplayFrequency
+    except Exception as e:
+        print(f"Could not read display refresh rate: {e}")
+    return 60
+
+def on_battery_power():
+    try:
+        return win32api.GetSystemPowerStatus()["ACLineStatus"] == 0
+    except Exception:
+        return False
+
+def idle_seconds():
+    """Seconds since the last keyboard/mouse input anywhere on the desktop"""
+    try:
+        # Both tick counts wrap after ~49.7 days
+        return ((win32api.GetTickCount() - win32api.GetLastInputInfo()) & 0xFFFFFFFF) / 1000.0
+    except Exception:
+        return 0.0
+
+class ModeStats:
+    """Wakeups and process CPU time per display mode, extrapolated to per-hour figures"""
     def __init__(self):
-        self.settings = SettingsManager()
+        self.totals = {}  # mode -> [wakeups, cpu seconds, wall seconds]
+        self.mode = None
+        self.wakeups = 0
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+    
+    def wakeup(self):
+        self.wakeups += 1
+    
+    def switch(self, mode):
+        self.flush()
+        self.mode = mode
+    
+    def flush(self):
+        cpu, wall = time.process_time(), time.perf_counter()
+        if self.mode is not None:
+            totals = self.totals.setdefault(self.mode, [0, 0.0, 0.0])
+            totals[0] += self.wakeups
+            totals[1] += cpu - self.cpu_start
+            totals[2] += wall - self.wall_start
+        self.wakeups = 0
+        self.cpu_start, self.wall_start = cpu, wall
+    
+    def report(self):
+        self.flush()
+        lines = []
+        for mode, (wakeups, cpu, wall) in self.totals.items():
+            if wall <= 0:
+                continue
+            lines.append(f"{mode}: {wakeups / wall * 3600:.0f} wakeups/h, {cpu / wall * 3600:.2f} s CPU/h "
+                         f"(measured over {wall / 60:.1f} min)")
+        return "\n".join(lines) or "No measurements yet"
+
+class StopwatchTimer:
+    """Stopwatch / countdown anchored to perf_counter_ns, so the shown time never drifts with frame timing"""
+    def __init__(self, mode, precision, countdown_seconds=0):
+        self.mode = mode
+        self.divisor = TIMER_PRECISIONS.get(precision, 10)
+        self.duration_ns = int(countdown_seconds) * 1_000_000_000
+        self.accumulated_ns = 0
+        self.started_ns = None
+    
+    @property
+    def running(self):
+        return self.started_ns is not None
+    
+    def start(self):
+        if not self.running and not self.finished():
+            self.started_ns = time.perf_counter_ns()
+    
+    def pause(self):
+        if self.running:
+            self.accumulated_ns += time.perf_counter_ns() - self.started_ns
+            self.started_ns = None
+    
+    def toggle(self):
+        if self.running:
+            self.pause()
+        else:
+            self.start()
+    
+    def reset(self):
+        self.accumulated_ns = 0
+        self.started_ns = None
+    
+    def elapsed_ns(self):
+        if self.running:
+            return self.accumulated_ns + time.perf_counter_ns() - self.started_ns
+        return self.accumulated_ns
+    
+    def display_ns(self):
+        if self.mode == "countdown":
+            return max(0, self.duration_ns - self.elapsed_ns())
+        return self.elapsed_ns()
+    
+    def finished(self):
+        return self.mode == "countdown" and self.elapsed_ns() >= self.duration_ns
+    
+    def parts(self):
+        """(HH, MM, SS, fraction) strings, computed with integer math only"""
+        display_ns = self.display_ns()
+        if self.mode == "countdown":
+            # Round up so the countdown shows 00.0 only when it has really expired
+            ticks = -(-display_ns * self.divisor // 1_000_000_000)
+        else:
+            ticks = display_ns * self.divisor // 1_000_000_000
+        total_seconds, fraction = divmod(ticks, self.divisor)
+        minutes, seconds = divmod(total_seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        width = 1 if self.divisor == 10 else 2
+        return f"{hours % 100:02d}", f"{minutes:02d}", f"{seconds:02d}", f"{fraction:0{width}d}"
+
+class ZoneClock:
+    """One world-clock zone. The UTC offset is cached until the zone's next transition, so a tick is an integer add"""
+    def __init__(self, key, now=None):
+        self.key = key
+        self.zone = ZoneInfo(key)
+        self.label = key.rsplit("/", 1)[-1].replace("_", " ")
+        self.offset = 0
+        self.valid_until = 0
+        self.refreshes = 0
+        self.refresh(int(time.time()) if now is None else now)
+    
+    def offset_at(self, utc):
+        return int(datetime.fromtimestamp(utc, self.zone).utcoffset().total_seconds())
+    
+    def refresh(self, utc):
+        """Offset at utc and the first second it changes (two changes within one scan step would be missed)"""
+        self.offset = self.offset_at(utc)
+        low, high = utc, utc + ZONE_SCAN_STEP
+        while high - utc <= ZONE_SCAN_HORIZON and self.offset_at(high) == self.offset:
+            low, high = high, high + ZONE_SCAN_STEP
+        if high - utc > ZONE_SCAN_HORIZON:
+            # No transition coming (fixed offset or DST abolished): look again after the horizon
+            self.valid_until = low
+        else:
+            while high - low > 1:
+                middle = (low + high) // 2
+                if self.offset_at(middle) == self.offset:
+                    low = middle
+                else:
+                    high = middle
+            self.valid_until = high
+        self.refreshes += 1
+    
+    def parts(self, utc):
+        """(HH, MM, SS) in this zone for an integer UTC timestamp"""
+        if utc >= self.valid_until:
+            self.refresh(utc)
+        local = utc + self.offset
+        return TWO_DIGITS[local // 3600 % 24], TWO_DIGITS[local // 60 % 60], TWO_DIGITS[local % 60]
+
+def load_world_zones(keys):
+    zones = []
+    for key in keys or []:
+        try:
+            zones.append(ZoneClock(key))
+        except Exception as e:
+            print(f"Unknown time zone {key!r}: {e}")
+    return zones
+
+def layout_world_rows(count, size):
+    """(rows per page, row height, y center of each row) for a world clock of count zones"""
+    top, bottom = size[1] * WORLD_BAND[0], size[1] * WORLD_BAND[1]
+    max_rows = max(1, int((bottom - top) // scaled(WORLD_ROW_MIN_HEIGHT, size)))
+    rows = max(1, min(count, max_rows))
+    row_height = (bottom - top) / rows
+    if rows == 1:
+        # A single zone sits where the normal clock does
+        return rows, row_height, [size[1] // 2]
+    return rows, row_height, [int(top + row_height * (index + 0.5)) for index in range(rows)]
+
+def ntp_timestamp(unix_ns):
+    seconds, remainder = divmod(unix_ns, 1_000_000_000)
+    return struct.pack("!II", (seconds + NTP_EPOCH_OFFSET) & 0xFFFFFFFF, (remainder << 32) // 1_000_000_000)
+
+def from_ntp_timestamp(data):
+    seconds, fraction = struct.unpack("!II", data)
+    return (seconds - NTP_EPOCH_OFFSET) * 1_000_000_000 + (fraction * 1_000_000_000 >> 32)
+
+class SystemClockReference:
+    """The OS wall clock as reference: a step in it is slewed in (or stepped when deliberate), never shown as a jump"""
+    name = "system clock"
+    poll_interval = TIME_SYSTEM_POLL_INTERVAL
+    
+    def sample(self, clock):
+        """(offset, round-trip delay) in ns of this reference relative to clock()"""
+        return time.time_ns() - clock(), 0
+
+def parse_time_server(server):
+    """(host, port) from host, host:port, an IPv6 address or [IPv6 address]:port; ValueError if malformed"""
+    server = server.strip()
+    if server.startswith("["):
+        host, bracket, rest = server[1:].partition("]")
+        if not bracket or (rest and not rest.startswith(":")):
+            raise ValueError(f"{server!r} is not [address]:port")
+        port = rest[1:]
+    elif server.count(":") > 1:
+        # Bare IPv6 address, default port
+        host, port = server, ""
+    elif ":" in server:
+        host, _, port = server.rpartition(":")
+    else:
+        host, port = server, ""
+    if not host or any(char.isspace() for char in host):
+        raise ValueError(f"{server!r} has no valid host name")
+    if port and not (port.isdigit() and 0 < int(port) < 65536):
+        raise ValueError(f"port {port!r} is not a number from 1 to 65535")
+    return host, int(port) if port else 123
+
+class SntpReference:
+    """Minimal SNTP client (RFC 4330): one UDP query per poll"""
+    poll_interval = TIME_SNTP_POLL_INTERVAL
+    
+    def __init__(self, server, timeout=TIME_SNTP_TIMEOUT):
+        self.address = parse_time_server(server)
+        self.name = f"SNTP {server}"
+        self.timeout = timeout
+    
+    def sample(self, clock):
+        request = bytearray(48)
+        request[0] = 0x1B  # leap 0, version 3, client
+        # Resolved on every poll: pool names rotate, and the address may be IPv4 or IPv6
+        family, kind, protocol, _, address = socket.getaddrinfo(*self.address, type=socket.SOCK_DGRAM)[0]
+        with socket.socket(family, kind, protocol) as sock:
+            sock.settimeout(self.timeout)
+            sent = clock()
+            request[40:48] = ntp_timestamp(sent)
+            sock.sendto(request, address)
+            reply, _ = sock.recvfrom(512)
+            received = clock()
+        # The server echoes our transmit time; anything else is a stale or forged reply
+        if len(reply) < 48 or reply[24:32] != request[40:48]:
+            raise ValueError("SNTP reply does not match the request")
+        if reply[0] & 0x07 not in (4, 5) or reply[1] == 0:
+            raise ValueError("SNTP server is not synchronized")
+        server_received = from_ntp_timestamp(reply[32:40])
+        server_sent = from_ntp_timestamp(reply[40:48])
+        offset = ((server_received - sent) + (server_sent - received)) // 2
+        delay = (received - sent) - (server_sent - server_received)
+        return offset, max(0, delay)
+
+def time_reference_for(settings):
+    """Reference for the time_server setting; a value that can't be used falls back to the system clock"""
+    server = (settings.get("time_server") or "").strip()
+    if not server:
+        return SystemClockReference()
+    try:
+        return SntpReference(server)
+    except ValueError as e:
+        print(f"Time server unusable, following the system clock: {e}")
+        return SystemClockReference()
+
+class TimeSource:
+    """Wall-clock time anchored to time.monotonic_ns(), corrected toward a reference.
+    
+    now_ns() is one wall-clock reading taken at startup plus monotonic time since, plus a correction;
+    check_wall_clock() re-takes that reading when the system clock jumps (suspend, manual change).
+    The reference (system clock or SNTP) is polled on a thread; its offset, filtered over the recent
+    samples, is slewed in at TIME_SLEW_MS_PER_SECOND so the display never jumps or runs backwards."""
+    def __init__(self, reference=None):
+        self.reference = reference or SystemClockReference()
+        self.anchor_wall_ns = time.time_ns()
+        self.anchor_mono_ns = time.monotonic_ns()
+        # (monotonic ns when the slew started, correction then, target correction); replaced as a whole
+        self.slew = (self.anchor_mono_ns, 0, 0)
+        self.samples = deque(maxlen=TIME_SAMPLES)  # (delay, offset) in ns
+        self.jitter_ns = 0
+        self.delay_ns = 0
+        self.sample_count = 0
+        self.failures = 0
+        self.last_error = None
+        self.local_offset = 0
+        self.offset_minute = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()  # cuts the poll interval short after a re-anchor
+        self.thread = None
+        self.min_poll_interval = 0  # raised in low-power mode to poll less often than the reference asks
+    
+    def base_ns(self):
+        """Uncorrected time: the startup wall clock advanced by the monotonic clock"""
+        return self.anchor_wall_ns + time.monotonic_ns() - self.anchor_mono_ns
+    
+    def check_wall_clock(self):
+        """Re-anchor when the system clock moved away from base_ns(); cheap enough for every tick.
+        The monotonic clock stops during suspend, so without this the display lags until the next poll."""
+        wall, mono = time.time_ns(), time.monotonic_ns()
+        if abs(wall - (self.anchor_wall_ns + mono - self.anchor_mono_ns)) <= TIME_STEP_THRESHOLD_MS * 1_000_000:
+            return False
+        with self.lock:
+            self.anchor_wall_ns, self.anchor_mono_ns = wall, mono
+            # Offsets were measured against the old anchor; the system clock is the best guess until a new sample steps in
+            self.slew = (mono, 0, 0)
+            self.samples.clear()
+            self.sample_count = 0
+        self.wake_event.set()
+        return True
+    
+    def correction_ns(self, mono=None):
+        mono = time.monotonic_ns() if mono is None else mono
+        started, start_correction, target = self.slew
+        max_step = (mono - started) * TIME_SLEW_MS_PER_SECOND // 1000
+        remaining = target - start_correction
+        if abs(remaining) <= max_step:
+            return target
+        return start_correction + (max_step if remaining > 0 else -max_step)
+    
+    def now_ns(self):
+        mono = time.monotonic_ns()
+        return self.anchor_wall_ns + mono - self.anchor_mono_ns + self.correction_ns(mono)
+    
+    def local_parts(self):
+        """(HH, MM, SS) local time from integers; the UTC offset is re-read once a minute, where DST changes happen"""
+        seconds = self.now_ns() // 1_000_000_000
+        minute = seconds // 60
+        if minute != self.offset_minute:
+            self.local_offset = time.localtime(seconds).tm_gmtoff
+            self.offset_minute = minute
+        local = seconds + self.local_offset
+        return TWO_DIGITS[local // 3600 % 24], TWO_DIGITS[local // 60 % 60], TWO_DIGITS[local % 60]
+    
+    def ms_until_next(self, period_seconds):
+        """Milliseconds until just after the next multiple of period_seconds on the corrected clock"""
+        period_ns = period_seconds * 1_000_000_000
+        return (period_ns - self.now_ns() % period_ns) // 1_000_000 + TICK_BOUNDARY_MARGIN_MS
+    
+    def add_sample(self, offset, delay):
+        """Fold in one (offset, delay) measurement against base_ns()"""
+        with self.lock:
+            self.samples.append((delay, offset))
+            samples = list(self.samples)
+            # Least delay is the least distorted by network queuing; ties go to the newest
+            best = min(range(len(samples)), key=lambda index: (samples[index][0], -index))
+            target = samples[best][1]
+            mean = sum(sample_offset for _, sample_offset in samples) / len(samples)
+            self.jitter_ns = int(math.sqrt(sum((sample_offset - mean) ** 2 for _, sample_offset in samples) / len(samples)))
+            self.delay_ns = delay
+            mono = time.monotonic_ns()
+            correction = self.correction_ns(mono)
+            if self.sample_count == 0 or abs(target - correction) > TIME_STEP_THRESHOLD_MS * 1_000_000:
+                # First measurement, or a deliberate clock change: step instead of slewing for minutes
+                correction = target
+            self.slew = (mono, correction, target)
+            self.sample_count += 1
+    
+    def poll_once(self):
+        try:
+            self.add_sample(*self.reference.sample(self.base_ns))
+            return True
+        except Exception as e:
+            self.failures += 1
+            if str(e) != self.last_error:
+                print(f"Time reference {self.reference.name} failed: {e}")
+            self.last_error = str(e)
+            return False
+    
+    def _poll(self):
+        while not self.stop_event.is_set():
+            self.poll_once()
+            self.wake_event.wait(max(self.reference.poll_interval, self.min_poll_interval))
+            self.wake_event.clear()
+    
+    def start(self):
+        if self.thread is None:
+            self.stop_event.clear()
+            self.wake_event.clear()
+            self.thread = threading.Thread(target=self._poll, daemon=True, name="secclock-time")
+            self.thread.start()
+    
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
+        self.thread = None
+    
+    def report(self):
+        _, _, target = self.slew
+        lines = [
+            f"Reference: {self.reference.name} ({self.sample_count} samples, {self.failures} failures)",
+            f"Measured offset {target / 1e6:+.1f} ms, applied {self.correction_ns() / 1e6:+.1f} ms",
+            f"Jitter {self.jitter_ns / 1e6:.2f} ms, last delay {self.delay_ns / 1e6:.2f} ms",
+        ]
+        if self.last_error and self.failures:
+            lines.append(f"Last error: {self.last_error}")
+        return "\n".join(lines)
+
+class FramePacer:
+    """Deadline-based frame scheduling for Tk's after() with dropped-frame and budget accounting"""
+    def __init__(self, fps, budget_fraction=0.5):
+        self.fps = fps
+        self.interval = 1.0 / fps
+        self.budget = self.interval * budget_fraction
+        self.reset()
+    
+    def reset(self):
+        now = time.perf_counter()
+        self.next_deadline = now + self.interval
+        self.report_at = now + TIMER_REPORT_INTERVAL
+        self.frames = 0
+        self.dropped = 0
+        self.over_budget = 0
+        self.worst_work = 0.0
+    
+    def frame_started(self):
+        now = time.perf_counter()
+        late = now - self.next_deadline
+        if late >= self.interval:
+            # Whole frame slots we slept through: count them and skip ahead instead of bursting
+            missed = int(late / self.interval)
+            self.dropped += missed
+            self.next_deadline += missed * self.interval
+        self.frames += 1
+        return now
+    
+    def frame_finished(self, started):
+        """Record the frame's work time and return the delay in ms until the next deadline"""
+        now = time.perf_counter()
+        work = now - started
+        self.worst_work = max(self.worst_work, work)
+        if work > self.budget:
+            self.over_budget += 1
+        self.next_deadline += self.interval
+        if now >= self.report_at:
+            self.report()
+            self.report_at = now + TIMER_REPORT_INTERVAL
+        return max(1, int((self.next_deadline - now) * 1000))
+    
+    def report(self):
+        total = self.frames + self.dropped
+        drop_pct = 100.0 * self.dropped / total if total else 0.0
+        print(f"Timer frames @ {self.fps} Hz: {self.frames} drawn, {self.dropped} dropped ({drop_pct:.1f}%), "
+              f"{self.over_budget} over {self.budget * 1000:.1f} ms budget, worst {self.worst_work * 1000:.2f} ms")
+
+class CrossfadeTransition:
+    """Blends two masked RGBA backgrounds on a worker thread; the UI thread pulls finished frames on a fixed cadence"""
+    BUFFERS = 3  # one being written, one queued, one being pasted
+    
+    def __init__(self, old_image, new_image, duration_ms, fps=CROSSFADE_FPS):
+        self.size = old_image.size
+        self.interval = 1.0 / fps
+        self.budget = self.interval * CROSSFADE_BUDGET_FRACTION
+        self.duration = duration_ms / 1000.0
+        self.steps = max(1, int(self.duration * fps))
+        self.stride = 1
+        
+        # 7-bit weights keep (new - old) * weight inside int16
+        self.old = np.asarray(old_image, dtype=np.int16)
+        self.diff = np.asarray(new_image, dtype=np.int16) - self.old
+        self.scratch = np.empty_like(self.old)
+        self.buffers = [np.empty(self.old.shape, dtype=np.uint8) for _ in range(self.BUFFERS)]
+        
+        self.frames = queue.Queue(maxsize=1)
+        self.cancelled = threading.Event()
+        self.last_step = 0
+        self.shown = 0
+        self.blend_times = []
+        self.started = None
+    
+    def start(self):
+        self.started = time.perf_counter()
+        threading.Thread(target=self._run, daemon=True).start()
+    
+    def cancel(self):
+        self.cancelled.set()
+    
+    def reduce_steps(self):
+        """Called when a frame went over budget: blend fewer, larger steps from now on"""
+        if self.stride < self.steps:
+            self.stride *= 2
+    
+    def blend(self, step, out):
+        weight = step * 128 // self.steps
+        np.multiply(self.diff, weight, out=self.scratch)
+        np.right_shift(self.scratch, 7, out=self.scratch)
+        np.add(self.scratch, self.old, out=self.scratch)
+        np.copyto(out, self.scratch, casting="unsafe")
+        return Image.frombuffer("RGBA", self.size, out, "raw", "RGBA", 0, 1)
+    
+    def _run(self):
+        step = 0
+        buffer_index = 0
+        while step < self.steps and not self.cancelled.is_set():
+            step = min(self.steps, step + self.stride)
+            started = time.perf_counter()
+            frame = self.blend(step, self.buffers[buffer_index])
+            elapsed = time.perf_counter() - started
+            self.blend_times.append(elapsed)
+            if elapsed > self.budget:
+                self.reduce_steps()
+            buffer_index = (buffer_index + 1) % self.BUFFERS
+            while not self.cancelled.is_set():
+                try:
+                    self.frames.put((step, frame), timeout=self.interval)
+                    break
+                except queue.Full:
+                    continue
+    
+    def next_frame(self):
+        """Newest finished frame, or None if the worker hasn't produced one since the last call"""
+        try:
+            step, frame = self.frames.get_nowait()
+        except queue.Empty:
+            return None
+        self.last_step = step
+        self.shown += 1
+        return frame
+    
+    def nbytes(self):
+        return self.old.nbytes + self.diff.nbytes + self.scratch.nbytes + sum(b.nbytes for b in self.buffers)
+    
+    @property
+    def done(self):
+        return self.last_step >= self.steps
+    
+    @property
+    def timed_out(self):
+        return time.perf_counter() - self.started > self.duration * CROSSFADE_TIMEOUT_FACTOR
+    
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        worst = max(self.blend_times, default=0.0)
+        print(f"Crossfade: {self.shown}/{self.steps} frames in {elapsed * 1000:.0f} ms "
+              f"({self.shown / elapsed if elapsed else 0:.1f} fps), worst blend {worst * 1000:.2f} ms, stride {self.stride}")
+
+def percentile(sorted_samples, fraction):
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * fraction))]
+
+class UiDispatcher:
+    """Bounded queue of calls drained on the Tk thread, with results as futures
+    
+    A drain is scheduled when the queue goes from empty to non-empty and repeats every interval_ms
+    only while calls are pending. Tcl builds without thread support can't take after() from other
+    threads, so there the queue is polled at interval_ms instead."""
+    def __init__(self, root, maxsize=UI_QUEUE_SIZE, interval_ms=UI_DRAIN_INTERVAL_MS, on_wakeup=None):
+        self.root = root
+        self.maxsize = maxsize
+        self.interval_ms = interval_ms
+        self.on_wakeup = on_wakeup
+        # deque append/popleft are atomic in CPython, so producers never take a lock
+        self.pending = deque()
+        self.latencies = deque(maxlen=UI_LATENCY_SAMPLES)
+        self.processed = 0
+        self.rejected = 0
+        self.running = False
+        self.scheduled = False
+        self.schedule_lock = threading.Lock()
+        try:
+            self.polling = not root.tk.call("set", "tcl_platform(threaded)")
+        except tk.TclError:
+            self.polling = True
+        self.executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="secclock-worker")
+    
+    def start(self):
+        self.running = True
+        self._drain()
+    
+    def stop(self):
+        """Stop draining; anything still queued is cancelled"""
+        self.running = False
+        while self.pending:
+            self.pending.popleft()[0].cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    def submit(self, fn, *args):
+        """Run fn(*args) on the Tk thread; safe to call from any thread. Returns a Future"""
+        future = Future()
+        if not self.running:
+            future.cancel()
+        elif len(self.pending) >= self.maxsize:
+            self.rejected += 1
+            future.set_exception(RuntimeError("UI queue full"))
+        else:
+            self.pending.append((future, fn, args, time.perf_counter()))
+            self._schedule(0)
+        return future
+    
+    def _schedule(self, delay_ms):
+        """Arrange one drain unless one is already due (polling mode always has one due).
+        Callers must not hold a lock the Tk thread takes: after() from a worker waits for it"""
+        if self.polling:
+            return
+        with self.schedule_lock:
+            if self.scheduled or not self.running:
+                return
+            self.scheduled = True
+        try:
+            # From a worker or the tray thread, threaded Tcl hands this call to the Tk thread
+            self.root.after(delay_ms, self._drain)
+        except (RuntimeError, tk.TclError) as e:
+            # Tk is shutting down or not in its main loop yet; the next submit tries again
+            with self.schedule_lock:
+                self.scheduled = False
+            print(f"UI dispatcher could not schedule a drain: {e}")
+    
+    def run_in_background(self, fn, *args, callback=None):
+        """Run fn(*args) on the worker pool; callback(completed_future) then runs on the Tk thread"""
+        future = self.executor.submit(fn, *args)
+        if callback:
+            future.add_done_callback(lambda done: self.submit(callback, done))
+        return future
+    
+    def _drain(self):
+        with self.schedule_lock:
+            self.scheduled = False
+        if not self.running:
+            return
+        if self.polling:
+            self.root.after(self.interval_ms, self._drain)
+        elif not self.pending:
+            return
+        if self.on_wakeup:
+            self.on_wakeup()
+        # Only what is queued now; calls submitted while draining wait for the next round
+        for _ in range(len(self.pending)):
+            if not self.running:
+                # A drained call (quit) stopped the dispatcher
+                return
+            future, fn, args, queued_at = self.pending.popleft()
+            self.latencies.append(time.perf_counter() - queued_at)
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                print(f"UI call {getattr(fn, '__name__', fn)} failed: {e}")
+                future.set_exception(e)
+            self.processed += 1
+        if self.running and self.pending:
+            # Calls queued while draining: keep the fixed cadence until the queue is empty
+            self._schedule(self.interval_ms)
+    
+    def report(self):
+        samples = sorted(self.latencies)
+        if samples:
+            p50 = percentile(samples, 0.5) * 1000
+            p99 = percentile(samples, 0.99) * 1000
+            latency = f"queue latency p50 {p50:.1f} ms, p99 {p99:.1f} ms, max {samples[-1] * 1000:.1f} ms"
+        else:
+            latency = "no queue latency samples"
+        print(f"UI dispatcher: {self.processed} calls, {self.rejected} rejected, {latency}")
+
+class SecClock:
+    def __init__(self, settings_file=None, desktop=True):
+        started = time.perf_counter()
+        font_mark = FONT_SERVICE.mark()
+        self.settings = SettingsManager(settings_file)
+        # False when driven by the trace replay: no tray icon, no startup-registry writes
+        self.desktop = desktop
+        self.settings_window = None
+        MEMORY_BUDGET.configure(self.settings.get("memory_budget_mb"))
+        
+        # Render at native resolution on high-DPI displays instead of being bitmap-stretched
+        try:
+            import ctypes
+            ctypes.windll.shcore.SetProcessDpiAwareness(1)
+        except Exception:
+            pass
         
         # Create main window FIRST and make it visible
         self.root = tk.Tk()
@@ -115,31 +1803,53 @@ class SecClock:
         
         self.root.overrideredirect(True)
         
+        # Wakeups and CPU per display mode (seconds / minutes)
+        self.mode_stats = ModeStats()
+        
+        # Tray and worker threads reach Tk and shared state only through this
+        self.dispatcher = UiDispatcher(self.root, on_wakeup=self.mode_stats.wakeup)
+        
         # Set window position and size from settings
         x = self.settings.get("window_x")
         y = self.settings.get("window_y")
-        size_preset = self.settings.get("window_size")
-        self.SIZE = SIZE_PRESETS[size_preset]
-        self.current_size_preset = size_preset
+        self.dpi_scale = self.detect_dpi_scale()
+        self.SIZE = self.compute_window_size()
+        
+        # Source images and masked backgrounds per size, so resizing never re-decodes (PIL only: workers fill it)
+        self.asset_cache = LRUCache(ASSET_CACHE_SIZE)
+        # Glyph and label PhotoImages per size and style: Tk thread only, budget evictions go through the dispatcher
+        self.glyph_cache = LRUCache(GLYPH_CACHE_SIZE, release_via=self.dispatcher.submit)
+        # Cache entries on screen (name -> (cache, key)), pinned so the budget doesn't release them
+        self.pins = {}
+        
+        # Current background as PIL (crossfade start) and the running transition, if any
+        self.bg_image = None
+        self.transition = None
+        self.transition_photo = None
+        self.transition_target = None
+        self._resize_after_id = None
         
         self.root.geometry(f"{self.SIZE[0]}x{self.SIZE[1]}+{x}+{y}")
         
         self.root.attributes("-topmost", True)
-        self.root.wm_attributes("-transparentcolor", "magenta")
+        try:
+            self.root.wm_attributes("-transparentcolor", "magenta")
+        except tk.TclError:
+            # Windows only; elsewhere the masked-out corners show as magenta
+            pass
         
-        self.url_index = 0
         self.custom_font = None
-        self.custom_bg_images = []
         self.current_bg_url = self.settings.get("current_bg_url")
         
         # Initialize
         self.load_custom_font()
-        self.load_custom_background()
+        self.load_background_providers()
         
         # Store current time parts
         self.current_hours = ""
         self.current_minutes = "" 
         self.current_seconds = ""
+        self.current_fraction = None
         
         # Canvas items
         self.hours_item = None
@@ -153,6 +1863,41 @@ class SecClock:
         self.seconds_image = None
         self.colon1_image = None
         self.colon2_image = None
+        self.dot_item = None
+        self.fraction_item = None
+        
+        # Part positions for HH:MM:SS and HH:MM, so switching modes only moves items
+        self.clock_layouts = {}
+        self.show_seconds = True
+        self.display_mode = None
+        self.power_checked_at = 0.0
+        
+        # Rendered clock parts keyed by text, rebuilt with the clock
+        self.glyph_images = {}
+        self.glyph_key = None
+        self.glyph_font = None
+        # (color, outline, shadow) of the digits; follows the background when auto contrast is on
+        self.digit_style = (self.settings.get("font_color"), None, None)
+        
+        # Stopwatch / countdown
+        self.timer = None
+        self.timer_config = None
+        self.high_res_timer = False
+        self.frame_pacer = FramePacer(get_display_refresh_rate())
+        self._tick_after_id = None
+        self.setup_timer()
+        
+        # World clock rows (one per visible zone) and the page of zones they show
+        self.world_zones = None
+        self.world_rows = []
+        self.world_labels = {}
+        self.world_page = None
+        self.world_pages = 1
+        self.setup_world_clock()
+        
+        # Monotonic-anchored time source, corrected against the system clock or an SNTP server
+        self.time_source = None
+        self.setup_time_source()
         
         # Create UI
         self.create_ui()
@@ -164,144 +1909,99 @@ class SecClock:
         self.setup_tray_icon()
         
         # Start clock
+        self.dispatcher.start()
         self._tick()
+        print(f"Startup: {(time.perf_counter() - started) * 1000:.0f} ms "
+              f"(font parsing {FONT_SERVICE.load_time_since(font_mark) * 1000:.2f} ms)")
         
+    def detect_dpi_scale(self, setting=None):
+        if setting is None:
+            setting = self.settings.get("dpi_scale")
+        if setting != "auto":
+            try:
+                return max(0.5, min(4.0, float(setting)))
+            except (TypeError, ValueError):
+                print(f"Invalid dpi_scale {setting!r}, using auto")
+        try:
+            return max(1.0, self.root.winfo_fpixels("1i") / 96.0)
+        except Exception:
+            return 1.0
+    
+    def compute_window_size(self):
+        return window_size_for(base_width_for(self.settings), self.dpi_scale)
+    
     def load_custom_font(self):
+        # font_size is specified for the 480x270 window and scales with it
+        self.custom_font = self.font_at(scaled(self.settings.get("font_size"), self.SIZE), digits_only=True)
+        self._pin_font("custom_font", self.custom_font)
+    
+    def _pin(self, name, cache, key):
+        """Pin the cache entry used as name, unpinning the one it replaces (key None: nothing in use)"""
+        if self.pins.get(name) == (cache, key):
+            return
+        old = self.pins.pop(name, None)
+        if old:
+            old[0].unpin(old[1])
+        if key is not None:
+            cache.pin(key)
+            self.pins[name] = (cache, key)
+    
+    def _pin_font(self, name, font):
+        self._pin(name, FONT_SERVICE.faces, (font.path, font.size) if font else None)
+    
+    def font_at(self, font_size, digits_only=False):
         try:
-            font_size = self.settings.get("font_size")
-            self.custom_font = ImageFont.truetype(FONT_PATH, font_size)
-            print(f"Font loaded: {FONT_PATH}, Size: {font_size}")
+            return FONT_SERVICE.face(font_size, digits_only and self.settings.get("font_subsetting"))
         except Exception as e:
             print(f"Error loading custom font: {e}")
-            self.custom_font = None
+            return None
     
-    def load_custom_background(self):
-        custom_bg = self.settings.get("custom_bg_image")
-        if custom_bg and os.path.exists(custom_bg):
-            self.custom_bg_images = [custom_bg]
-            print(f"Custom background loaded: {custom_bg}")
-        else:
-            self.custom_bg_images = []
-            print("Using default online backgrounds")
-    
-    def load_mask_for_size(self, size_preset):
-        """Load the appropriate mask for the given size preset"""
-        try:
-            mask_path = MASK_PATHS.get(size_preset)
-            if mask_path and os.path.exists(mask_path):
-                mask = Image.open(mask_path).convert("L")
-                # Verify mask size matches expected size
-                expected_size = SIZE_PRESETS[size_preset]
-                if mask.size != expected_size:
-                    print(f"Warning: Mask size {mask.size} doesn't match expected size {expected_size} for {size_preset}")
-                    # Resize mask to correct size
-                    mask = mask.resize(expected_size, Image.LANCZOS)
-                print(f"Mask loaded successfully for {size_preset}: {mask_path}")
-                return mask
-            else:
-                print(f"Mask file not found for {size_preset}: {mask_path}")
-                # Fallback: create dynamic mask
-                return self.create_dynamic_mask(SIZE_PRESETS[size_preset])
-        except Exception as e:
-            print(f"Error loading mask for {size_preset}: {e}")
-            # Fallback: create dynamic mask
-            return self.create_dynamic_mask(SIZE_PRESETS[size_preset])
-    
-    def create_dynamic_mask(self, size):
-        """Fallback: create a dynamic mask if separate mask files are missing"""
-        width, height = size
-        radius = min(60, height // 4)  # Smaller radius for smaller windows
-        
-        mask = Image.new("L", size, 0)
-        draw = ImageDraw.Draw(mask)
-        
-        # Draw main rectangle (top part - straight edges)
-        draw.rectangle([0, 0, width, height - radius], fill=255)
-        
-        # Draw bottom part with rounded corners
-        draw.pieslice([0, height - 2*radius, 2*radius, height], 90, 180, fill=255)
-        draw.pieslice([width - 2*radius, height - 2*radius, width, height], 0, 90, fill=255)
-        draw.rectangle([radius, height - radius, width - radius, height], fill=255)
-        draw.polygon([(0, height - radius), (radius, height - radius), (0, height)], fill=255)
-        draw.polygon([(width, height - radius), (width - radius, height - radius), (width, height)], fill=255)
-        
-        print(f"Created dynamic fallback mask for size {size}")
-        return mask
+    def load_background_providers(self):
+        """(Re)build the ↻ rotation from settings; statistics start over"""
+        self.rotation = build_rotation(self.settings)
     
     def create_text_image(self, text, font, color=None, fixed_width=None):
+        outline = shadow = None
         if color is None:
-            color = self.settings.get("font_color")
-            
-        # Create a temporary image to measure text size
-        temp_img = Image.new("RGB", (1, 1))
-        temp_draw = ImageDraw.Draw(temp_img)
-        
-        if font:
-            bbox = temp_draw.textbbox((0, 0), text, font=font)
-            text_width = bbox[2] - bbox[0] + 20  # More padding
-            text_height = bbox[3] - bbox[1] + 20
-        else:
-            # Fallback if font is None
-            text_width = 60
-            text_height = 60
-        
-        if fixed_width:
-            text_width = fixed_width
-        
-        # Create transparent image for text
-        text_img = Image.new("RGBA", (text_width, text_height), (0, 0, 0, 0))
-        text_draw = ImageDraw.Draw(text_img)
-        
-        # Draw text centered
-        if font:
-            text_draw.text((text_width // 2, text_height // 2), text, fill=color, font=font, anchor="mm")
-        else:
-            # Fallback: use default font
-            fallback_font = ImageFont.load_default()
-            text_draw.text((text_width // 2, text_height // 2), text, fill=color, font=fallback_font, anchor="mm")
-        
-        return ImageTk.PhotoImage(text_img), text_width
+            color, outline, shadow = self.digit_style
+        text_img = render_text_image(text, font, color, fixed_width, outline, shadow)
+        return ImageTk.PhotoImage(text_img), text_img.width
     
-    def download_image(self, url):
-        try:
-            print(f"Downloading background: {url}")
-            r = requests.get(url, timeout=10)
-            r.raise_for_status()
-            im = Image.open(io.BytesIO(r.content)).convert("RGB")
-            im = im.resize(self.SIZE, Image.LANCZOS)  # This uses current self.SIZE
-            
-            # Load the appropriate mask for current size
-            mask = self.load_mask_for_size(self.current_size_preset)
-            im_rgba = im.convert("RGBA")
-            
-            # Apply mask
-            im_rgba.putalpha(mask)
-            
-            print("Background downloaded successfully")
-            return ImageTk.PhotoImage(im_rgba)
-        except Exception as e:
-            print(f"Error downloading background: {e}")
-            return None
-
-    def load_local_image(self, path):
-        try:
-            print(f"Loading local image: {path}")
-            im = Image.open(path).convert("RGB")
-            im = im.resize(self.SIZE, Image.LANCZOS)  # This uses current self.SIZE
-            
-            # Load the appropriate mask for current size
-            mask = self.load_mask_for_size(self.current_size_preset)
-            im_rgba = im.convert("RGBA")
-            
-            # Apply mask
-            im_rgba.putalpha(mask)
-            
-            print("Local image loaded successfully")
-            return ImageTk.PhotoImage(im_rgba)
-        except Exception as e:
-            print(f"Error loading local image: {e}")
+    def masked_background(self, source, refresh=False, size=None, opener=open_image_source):
+        """Masked RGBA background for a source at a size (default: current); decoded sources are kept for resizes, capped at the largest window"""
+        size = size or self.SIZE
+        key = ("background", source, size)
+        im_rgba = None if refresh else self.asset_cache.get(key)
+        if im_rgba is None:
+            # Generated sources are produced at the target size rather than resized
+            source_key = ("source", source, size) if is_procedural(source) else ("source", source)
+            im = None if refresh else self.asset_cache.get(source_key)
+            if im is None:
+                im = opener(source, size)
+                # A 24 MP photo decodes to ~96 MB; keep no more than the largest window can show.
+                # prepare_background() stretches to the window anyway, so each side is capped on its own
+                cap = window_size_for(MAX_WINDOW_WIDTH)
+                if im.width > cap[0] or im.height > cap[1]:
+                    im = im.resize((min(im.width, cap[0]), min(im.height, cap[1])), Image.LANCZOS)
+                self.asset_cache.put(source_key, im)
+            im_rgba = prepare_background(im, size)
+            self.asset_cache.put(key, im_rgba)
+        return im_rgba
+    
+    def contrast_args(self):
+        """Font, colors and digit band the style depends on, or None when auto contrast is off (captured on the Tk thread)"""
+        if not self.settings.get("auto_contrast"):
             return None
-        
+        # Several world-clock rows spread over WORLD_BAND; a single zone sits where the normal clock does
+        band = WORLD_BAND if self.world_zones and len(self.world_zones) > 1 else None
+        return self.custom_font, self.settings.get("font_color"), self.settings.get("contrast_style"), band
+    
+    def digit_style_for(self, source, image):
+        args = self.contrast_args()
+        if args is None or image is None:
+            return (self.settings.get("font_color"), None, None)
+        return cached_digit_style(source, image, *args)
+    
     def create_ui(self):
         print("Creating UI...")
         
@@ -334,7 +2034,6 @@ class SecClock:
             cursor="hand2",
             font=("Arial", 10, "bold")
         )
-        self.settings_btn.place(x=10, y=10, width=25, height=25)
 
         # Close button
         self.close_btn = tk.Button(
@@ -349,7 +2048,6 @@ class SecClock:
             cursor="hand2",
             font=("Arial", 12, "bold")
         )
-        self.close_btn.place(x=self.SIZE[0]-35, y=10, width=25, height=25)
 
         # Background change button
         self.bg_btn = tk.Button(
@@ -364,7 +2062,7 @@ class SecClock:
             cursor="hand2", 
             font=("Arial", 12, "bold")
         )
-        self.bg_btn.place(x=self.SIZE[0]-70, y=10, width=25, height=25)
+        self._place_buttons()
 
         # Dragging (if not locked)
         if not self.settings.get("lock_dragging"):
@@ -372,38 +2070,107 @@ class SecClock:
             self._drag_dy = 0
             self.canvas.bind("<Button-1>", self._start_drag)
             self.canvas.bind("<B1-Motion>", self._on_drag)
+        
+        # Timer controls: double-click start/pause, right-click reset
+        self.canvas.bind("<Double-Button-1>", lambda e: self.toggle_timer())
+        self.canvas.bind("<Button-3>", lambda e: self.reset_timer())
+        
+        # Leave idle low-power mode when the pointer comes back
+        self.canvas.bind("<Enter>", self._on_pointer_enter)
+        
+        # Ctrl + mouse wheel resizes continuously
+        self.canvas.bind("<Control-MouseWheel>", self._on_resize_wheel)
             
         print("UI created successfully")
     
+    def _button_boxes(self):
+        """(x, y, width, height) of the settings, background and close buttons, scaled for DPI"""
+        size = max(16, int(round(25 * self.dpi_scale)))
+        margin = int(round(10 * self.dpi_scale))
+        width = self.SIZE[0]
+        return {
+            "settings": (margin, margin, size, size),
+            "background": (width - 2 * margin - 2 * size, margin, size, size),
+            "close": (width - margin - size, margin, size, size),
+        }
+    
+    def _place_buttons(self):
+        boxes = self._button_boxes()
+        for button, name in ((self.settings_btn, "settings"), (self.bg_btn, "background"), (self.close_btn, "close")):
+            x, y, width, height = boxes[name]
+            button.place(x=x, y=y, width=width, height=height)
+    
+    def resize_window(self, size):
+        """Resize the window and rebuild the face; masks, fonts, glyphs and backgrounds come from the caches"""
+        if size != self.SIZE:
+            # Stocked backups were prepared for the old size; free them now rather than on the next ↻
+            self.rotation.clear_ready()
+        self.SIZE = size
+        x = self.root.winfo_x()
+        y = self.root.winfo_y()
+        self.root.geometry(f"{size[0]}x{size[1]}+{x}+{y}")
+        
+        self.load_custom_font()
+        
+        # Clear canvas and resize
+        self.canvas.delete("all")
+        self.canvas.config(width=size[0], height=size[1])
+        
+        self.load_current_background()
+        self._create_separated_clock()
+        self._place_buttons()
+    
+    def _on_resize_wheel(self, event):
+        step = 1.1 if event.delta > 0 else 1 / 1.1
+        width = base_width_for(self.settings) * step
+        new_size = window_size_for(width, self.dpi_scale)
+        if new_size == self.SIZE:
+            return
+        self.settings.settings["window_size"] = "custom"
+        self.settings.settings["window_width"] = int(round(new_size[0] / self.dpi_scale))
+        # Coalesce a burst of wheel events into one rebuild
+        if self._resize_after_id:
+            self.root.after_cancel(self._resize_after_id)
+        self._resize_after_id = self.root.after(30, self._apply_wheel_resize)
+    
+    def _apply_wheel_resize(self):
+        self._resize_after_id = None
+        self.resize_window(self.compute_window_size())
+        self.settings.save_settings()
+    
     def load_current_background(self):
         print("Loading current background...")
         
         # Clear existing background to force reload
+        self.cancel_transition()
         self.bg = None
         
-        if self.custom_bg_images:
-            # Use custom background
-            self.bg = self.load_local_image(self.custom_bg_images[0])
-            print(f"Loaded custom background: {self.custom_bg_images[0]}")
-        else:
-            # Use online backgrounds
-            IMG_URLS = [
-                "https://picsum.photos/800/600",
-                "https://loremflickr.com/800/600/nature", 
-                "https://picsum.photos/seed/pic1/800/600",
-            ]
-            
-            # Use current URL if available, otherwise get new one
-            if self.current_bg_url and self.current_bg_url in IMG_URLS:
-                url_index = IMG_URLS.index(self.current_bg_url)
-                self.bg = self.download_image(self.current_bg_url)
-                self.url_index = url_index
-                print(f"Reloaded existing online background: {self.current_bg_url}")
-            else:
-                self.bg = self.download_image(IMG_URLS[self.url_index])
-                self.current_bg_url = IMG_URLS[self.url_index]
+        # The saved background if its provider is still configured, otherwise the rotation's pick
+        source = None
+        try:
+            provider, source = self.rotation.locate(self.current_bg_url)
+            self.bg_image = self.masked_background(source, opener=provider.fetch)
+        except Exception as e:
+            print(f"Error loading background: {e}")
+            self.bg_image = None
+        
+        if self.bg_image is None and self.rotation.fallback:
+            print("Failed to load background - using generated fallback")
+            try:
+                source = self.rotation.fallback.next_source()
+                self.bg_image = self.masked_background(source, opener=self.rotation.fallback.fetch)
+            except Exception as e:
+                print(f"Error generating background: {e}")
+        
+        if self.bg_image is not None:
+            self.bg = ImageTk.PhotoImage(self.bg_image)
+            if source != self.current_bg_url:
+                self.current_bg_url = source
                 self.settings.set("current_bg_url", self.current_bg_url)
-                print(f"Loaded new online background: {self.current_bg_url}")
+            print(f"Loaded background: {source}")
+        self._track_current_background()
+        # The clock is (re)built right after this, with the new style
+        self.digit_style = self.digit_style_for(source, self.bg_image)
         
         if self.bg:
             # Remove old background item if it exists
@@ -417,7 +2184,7 @@ class SecClock:
             print("Failed to load background - using fallback")
             # Create a fallback background with proper masking
             fallback_bg = Image.new("RGB", self.SIZE, "#333333")
-            mask = self.load_mask_for_size(self.current_size_preset)
+            mask = load_mask(self.SIZE)
             fallback_bg_rgba = fallback_bg.convert("RGBA")
             fallback_bg_rgba.putalpha(mask)
             self.bg = ImageTk.PhotoImage(fallback_bg_rgba)
@@ -428,117 +2195,311 @@ class SecClock:
             # Make sure background is behind everything
             self.canvas.lower(self.bg_item)
     
+    def _display_parts(self):
+        """(HH, MM, SS, fraction) for the current mode; fraction is None in clock mode"""
+        if self.timer:
+            return self.timer.parts()
+        return (*self.time_source.local_parts(), None)
+    
+    def _glyph(self, text, fixed_width=None):
+        """Cached PhotoImage for a clock part, so updates only swap images instead of rendering text"""
+        if text not in self.glyph_images:
+            self.glyph_images[text] = self.create_text_image(text, self.glyph_font, fixed_width=fixed_width)
+            # Re-put so the memory budget sees the grown glyph set
+            self.glyph_cache.put(self.glyph_key, self.glyph_images)
+        return self.glyph_images[text]
+    
+    def _prerender_fractions(self):
+        """Render every fraction value up front so the per-frame path never touches PIL"""
+        divisor = self.timer.divisor
+        digits = 1 if divisor == 10 else 2
+        return max(self._glyph(f"{value:0{digits}d}")[1] for value in range(divisor))
+    
+    def _use_glyph_set(self, font):
+        # Glyphs are kept per font size and style, so going back to an earlier size or background reuses them
+        self.glyph_font = font
+        self.glyph_key = glyph_key = ("glyphs", self.SIZE, getattr(font, "size", None), self.digit_style)
+        self.glyph_images = self.glyph_cache.get(glyph_key)
+        if self.glyph_images is None:
+            self.glyph_images = {}
+            self.glyph_cache.put(glyph_key, self.glyph_images)
+        self._pin("glyphs", self.glyph_cache, glyph_key)
+        self._pin_font("glyph_font", font)
+    
     def _create_separated_clock(self):
+        if self.world_zones:
+            self._create_world_clock()
+            return
         print("Creating separated clock...")
         
-        current_time = datetime.now()
-        hours = current_time.strftime("%H")
-        minutes = current_time.strftime("%M") 
-        seconds = current_time.strftime("%S")
+        # No city labels outside world-clock mode
+        self._pin("labels", None, None)
+        self._pin_font("label_font", None)
+        self._use_glyph_set(self.custom_font)
+        hours, minutes, seconds, fraction = self._display_parts()
         
         self.current_hours = hours
         self.current_minutes = minutes
         self.current_seconds = seconds
+        self.current_fraction = fraction
+        self.dot_item = None
+        self.fraction_item = None
         
         center_x = self.SIZE[0] // 2
         center_y = self.SIZE[1] // 2
         
         if self.custom_font:
             print("Using custom font for clock")
-            hours_img, hours_width = self.create_text_image(hours, self.custom_font)
-            minutes_img, minutes_width = self.create_text_image(minutes, self.custom_font)
-            seconds_img, seconds_width = self.create_text_image(seconds, self.custom_font)
-            colon_img, colon_width = self.create_text_image(":", self.custom_font, fixed_width=20)
+            hours_img, hours_width = self._glyph(hours)
+            minutes_img, minutes_width = self._glyph(minutes)
+            seconds_img, seconds_width = self._glyph(seconds)
+            colon_img, colon_width = self._glyph(":", fixed_width=scaled(20, self.SIZE))
             
-            total_width = hours_width + colon_width + minutes_width + colon_width + seconds_width
-            start_x = center_x - total_width // 2
-            current_x = start_x
+            widths = [hours_width, colon_width, minutes_width, colon_width, seconds_width]
+            if fraction is not None:
+                dot_img, dot_width = self._glyph(".", fixed_width=scaled(20, self.SIZE))
+                widths += [dot_width, self._prerender_fractions()]
+            centers = layout_separated_clock(widths, self.SIZE)
+            hours_x, colon1_x, minutes_x, colon2_x, seconds_x = centers[:5]
+            self.clock_layouts = {
+                "seconds": centers[:5],
+                "minutes": layout_separated_clock(widths[:3], self.SIZE),
+            }
             
             # Hours
             self.hours_item = self.canvas.create_image(
-                current_x + hours_width // 2, center_y, image=hours_img, anchor="center"
+                hours_x, center_y, image=hours_img, anchor="center", tags="clock"
             )
             self.hours_image = hours_img
-            current_x += hours_width
             
             # First colon
             self.colon1_item = self.canvas.create_image(
-                current_x + colon_width // 2, center_y, image=colon_img, anchor="center"
+                colon1_x, center_y, image=colon_img, anchor="center", tags="clock"
             )
             self.colon1_image = colon_img
-            current_x += colon_width
             
             # Minutes  
             self.minutes_item = self.canvas.create_image(
-                current_x + minutes_width // 2, center_y, image=minutes_img, anchor="center"
+                minutes_x, center_y, image=minutes_img, anchor="center", tags="clock"
             )
             self.minutes_image = minutes_img
-            current_x += minutes_width
             
             # Second colon
             self.colon2_item = self.canvas.create_image(
-                current_x + colon_width // 2, center_y, image=colon_img, anchor="center"
+                colon2_x, center_y, image=colon_img, anchor="center", tags="clock"
             )
             self.colon2_image = colon_img
-            current_x += colon_width
             
             # Seconds
             self.seconds_item = self.canvas.create_image(
-                current_x + seconds_width // 2, center_y, image=seconds_img, anchor="center"
+                seconds_x, center_y, image=seconds_img, anchor="center", tags="clock"
             )
             self.seconds_image = seconds_img
             
+            # Timer fraction (tenths / hundredths)
+            if fraction is not None:
+                self.dot_item = self.canvas.create_image(
+                    centers[5], center_y, image=dot_img, anchor="center", tags="clock"
+                )
+                self.fraction_item = self.canvas.create_image(
+                    centers[6], center_y, image=self._glyph(fraction)[0], anchor="center", tags="clock"
+                )
+            
         else:
             print("Using fallback font for clock")
-            time_str = f"{hours}:{minutes}:{seconds}"
             self.hours_item = self.canvas.create_text(
-                center_x, center_y, text=time_str,
-                fill=self.settings.get("font_color"),
-                font=("Arial", self.settings.get("font_size"), "bold"),
-                anchor="center"
+                center_x, center_y, text=self._fallback_text(hours, minutes, seconds, fraction),
+                fill=self.digit_style[0],
+                font=("Arial", scaled(self.settings.get("font_size"), self.SIZE), "bold"),
+                anchor="center", tags="clock"
             )
         
+        self._apply_display_layout()
         print("Clock created successfully")
     
+    def _fallback_text(self, hours, minutes, seconds, fraction):
+        if not self.show_seconds:
+            return f"{hours}:{minutes}"
+        time_str = f"{hours}:{minutes}:{seconds}"
+        if fraction is not None:
+            time_str += f".{fraction}"
+        return time_str
+    
+    def _apply_display_layout(self):
+        """Show or hide the seconds and move the parts into place, without rebuilding the canvas"""
+        if self.world_zones:
+            self._apply_world_layout()
+            return
+        if not self.custom_font:
+            if self.hours_item:
+                self.canvas.itemconfig(self.hours_item, text=self._fallback_text(*self._display_parts()))
+            return
+        if not self.clock_layouts:
+            return
+        center_y = self.SIZE[1] // 2
+        centers = self.clock_layouts["seconds" if self.show_seconds else "minutes"]
+        for canvas_item, center_x in zip((self.hours_item, self.colon1_item, self.minutes_item), centers):
+            self.canvas.coords(canvas_item, center_x, center_y)
+        state = "normal" if self.show_seconds else "hidden"
+        for canvas_item, center_x in zip((self.colon2_item, self.seconds_item), self.clock_layouts["seconds"][3:]):
+            self.canvas.coords(canvas_item, center_x, center_y)
+            self.canvas.itemconfig(canvas_item, state=state)
+    
     def _update_separated_clock(self):
-        current_time = datetime.now()
-        new_hours = current_time.strftime("%H")
-        new_minutes = current_time.strftime("%M")
-        new_seconds = current_time.strftime("%S")
+        if self.world_zones:
+            self._update_world_clock()
+            return
+        new_hours, new_minutes, new_seconds, new_fraction = self._display_parts()
         
         if self.custom_font:
+            # Fast-changing digits first; in timer mode this is usually the only change in a frame
+            if new_fraction != self.current_fraction and self.fraction_item:
+                self.canvas.itemconfig(self.fraction_item, image=self._glyph(new_fraction)[0])
+                self.current_fraction = new_fraction
+            
             if new_hours != self.current_hours and self.hours_item:
-                hours_img, _ = self.create_text_image(new_hours, self.custom_font)
+                hours_img, _ = self._glyph(new_hours)
                 self.canvas.itemconfig(self.hours_item, image=hours_img)
                 self.hours_image = hours_img
                 self.current_hours = new_hours
             
             if new_minutes != self.current_minutes and self.minutes_item:
-                minutes_img, _ = self.create_text_image(new_minutes, self.custom_font)
+                minutes_img, _ = self._glyph(new_minutes)
                 self.canvas.itemconfig(self.minutes_item, image=minutes_img)
                 self.minutes_image = minutes_img
                 self.current_minutes = new_minutes
             
             if new_seconds != self.current_seconds and self.seconds_item:
-                seconds_img, _ = self.create_text_image(new_seconds, self.custom_font)
+                seconds_img, _ = self._glyph(new_seconds)
                 self.canvas.itemconfig(self.seconds_item, image=seconds_img)
                 self.seconds_image = seconds_img
                 self.current_seconds = new_seconds
                 
         else:
-            if new_seconds != self.current_seconds and self.hours_item:
-                time_str = f"{new_hours}:{new_minutes}:{new_seconds}"
-                self.canvas.itemconfig(self.hours_item, text=time_str)
+            if (new_seconds != self.current_seconds or new_fraction != self.current_fraction) and self.hours_item:
+                self.canvas.itemconfig(self.hours_item, text=self._fallback_text(new_hours, new_minutes, new_seconds, new_fraction))
                 self.current_hours = new_hours
                 self.current_minutes = new_minutes
                 self.current_seconds = new_seconds
+                self.current_fraction = new_fraction
+    
+    def setup_world_clock(self):
+        """Zones for world-clock mode (None otherwise); offsets and transitions are worked out here, not per tick"""
+        self.world_zones = None
+        if self.settings.get("clock_mode") == "world":
+            self.world_zones = load_world_zones(self.settings.get("world_zones")) or None
+    
+    def _create_world_clock(self):
+        """One row per zone, paged when they don't fit: city label and HH:MM:SS, all rows sharing one glyph set and layout"""
+        print("Creating world clock...")
+        zones = self.world_zones
+        rows, row_height, rows_y = layout_world_rows(len(zones), self.SIZE)
+        self.world_pages = -(-len(zones) // rows)
+        self.world_page = None
+        self.world_rows = []
+        self.clock_layouts = {}
+        base_size = scaled(self.settings.get("font_size"), self.SIZE)
+        digit_size = min(base_size, int(row_height * 0.8))
+        label_size = max(8, int(digit_size * WORLD_LABEL_SCALE))
+        digit_font = self.font_at(digit_size, digits_only=True) if self.custom_font else None
+        label_font = self.font_at(label_size) if digit_font else None
+        
+        if digit_font and label_font:
+            self._use_glyph_set(digit_font)
+            colon_img, colon_width = self._glyph(":", fixed_width=max(1, scaled(20, self.SIZE) * digit_size // base_size))
+            digit_width = self._glyph("00")[1]
+            # City labels are rendered once per layout and reused on every page
+            label_key = ("labels", self.SIZE, label_size, self.digit_style)
+            self.world_labels = self.glyph_cache.get(label_key) or {}
+            for zone in zones:
+                if zone.label not in self.world_labels:
+                    self.world_labels[zone.label] = self.create_text_image(zone.label, label_font)
+            self.glyph_cache.put(label_key, self.world_labels)
+            self._pin("labels", self.glyph_cache, label_key)
+            self._pin_font("label_font", label_font)
+            label_width = max(self.world_labels[zone.label][1] for zone in zones)
+            
+            widths = [label_width, digit_width, colon_width, digit_width, colon_width, digit_width]
+            for mode, count in (("seconds", 6), ("minutes", 4)):
+                centers = layout_separated_clock(widths[:count], self.SIZE)
+                # Labels are right-aligned against the time
+                self.clock_layouts[mode] = [centers[0] + label_width // 2] + centers[1:]
+            centers = self.clock_layouts["seconds"]
+            for row_y in rows_y:
+                items = [self.canvas.create_image(centers[0], row_y, anchor="e", tags="clock")]
+                for slot, center_x in enumerate(centers[1:]):
+                    image = colon_img if slot % 2 else None
+                    items.append(self.canvas.create_image(center_x, row_y, image=image, anchor="center", tags="clock"))
+                self.world_rows.append({"zone": None, "items": items, "shown": [None, None, None], "y": row_y})
+        else:
+            for row_y in rows_y:
+                item = self.canvas.create_text(
+                    self.SIZE[0] // 2, row_y, fill=self.digit_style[0],
+                    font=("Arial", digit_size, "bold"), anchor="center", tags="clock"
+                )
+                self.world_rows.append({"zone": None, "items": [item], "shown": [None, None, None], "y": row_y})
+        
+        self._update_world_clock()
+        print(f"World clock created: {len(zones)} zones, {rows} rows, {self.world_pages} pages")
+    
+    def _apply_world_layout(self):
+        centers = self.clock_layouts.get("seconds" if self.show_seconds else "minutes")
+        for row in self.world_rows:
+            if row["zone"] is None:
+                continue
+            if not centers:
+                # Fallback font: the row text is rebuilt with or without seconds
+                row["shown"] = [None, None, None]
+                continue
+            items = row["items"]
+            for canvas_item, center_x in zip(items[:4], centers):
+                self.canvas.coords(canvas_item, center_x, row["y"])
+            state = "normal" if self.show_seconds else "hidden"
+            for canvas_item in items[4:]:
+                self.canvas.itemconfig(canvas_item, state=state)
+    
+    def _show_world_page(self, page):
+        self.world_page = page
+        first = page * len(self.world_rows)
+        for index, row in enumerate(self.world_rows):
+            zone = self.world_zones[first + index] if first + index < len(self.world_zones) else None
+            row["zone"] = zone
+            row["shown"] = [None, None, None]
+            for canvas_item in row["items"]:
+                self.canvas.itemconfig(canvas_item, state="normal" if zone else "hidden")
+            if zone and self.clock_layouts:
+                self.canvas.itemconfig(row["items"][0], image=self.world_labels[zone.label][0])
+        self._apply_world_layout()
+    
+    def _update_world_clock(self):
+        """Per tick: an integer add per zone, and an image swap only where a two-digit part changed"""
+        utc = self.time_source.now_ns() // 1_000_000_000
+        page = utc // WORLD_PAGE_SECONDS % self.world_pages
+        if page != self.world_page:
+            self._show_world_page(page)
+        for row in self.world_rows:
+            zone = row["zone"]
+            if zone is None:
+                continue
+            parts = zone.parts(utc)
+            shown = row["shown"]
+            items = row["items"]
+            if not self.clock_layouts:
+                if parts[0] != shown[0] or parts[1] != shown[1] or (self.show_seconds and parts[2] != shown[2]):
+                    time_str = ":".join(parts if self.show_seconds else parts[:2])
+                    self.canvas.itemconfig(items[0], text=f"{zone.label}  {time_str}")
+                    shown[:] = parts
+                continue
+            for slot, canvas_item in ((0, items[1]), (1, items[3]), (2, items[5])):
+                if parts[slot] != shown[slot]:
+                    self.canvas.itemconfig(canvas_item, image=self._glyph(parts[slot])[0])
+                    shown[slot] = parts[slot]
     
     def _start_drag(self, event):
-        if any([
-            (10 <= event.x <= 35 and 10 <= event.y <= 35),  # Settings button
-            (self.SIZE[0]-70 <= event.x <= self.SIZE[0]-45 and 10 <= event.y <= 35),  # BG button
-            (self.SIZE[0]-35 <= event.x <= self.SIZE[0]-10 and 10 <= event.y <= 35)   # Close button
-        ]):
+        if any(
+            x <= event.x <= x + width and y <= event.y <= y + height
+            for x, y, width, height in self._button_boxes().values()
+        ):
             return
         self._drag_dx = event.x
         self._drag_dy = event.y
@@ -555,46 +2516,259 @@ class SecClock:
                 self.settings.set("window_y", y)
     
     def _tick(self):
-        self._update_separated_clock()
-        self.root.after(200, self._tick)
+        self.mode_stats.wakeup()
+        if self.time_source.check_wall_clock():
+            print("System clock jumped (suspend or clock change); re-anchored the time source")
+        if self.timer and self.timer.running:
+            # Running timer: redraw at the display refresh rate against fixed deadlines
+            started = self.frame_pacer.frame_started()
+            self._update_separated_clock()
+            if self.timer.finished():
+                self.timer.pause()
+                self._on_timer_stopped()
+                delay = 200
+            else:
+                delay = self.frame_pacer.frame_finished(started)
+        else:
+            self._update_display_mode()
+            self._update_separated_clock()
+            # Wake just after each second (or minute) boundary of the corrected clock
+            delay = self.time_source.ms_until_next(1) if self.show_seconds else self._ms_to_next_minute()
+            if self.world_zones and self.world_pages > 1:
+                # World-clock pages turn every WORLD_PAGE_SECONDS, in minutes mode too
+                delay = min(delay, self.time_source.ms_until_next(WORLD_PAGE_SECONDS))
+        self._tick_after_id = self.root.after(delay, self._tick)
     
-    def change_background_threaded(self):
-        threading.Thread(target=self._change_background, daemon=True).start()
+    def _ms_to_next_minute(self):
+        # Land just after the boundary so the new minute is already there
+        return max(50, self.time_source.ms_until_next(60) + 15)
+    
+    def setup_time_source(self):
+        """(Re)create the time source when the configured reference changes"""
+        reference = time_reference_for(self.settings)
+        if self.time_source and self.time_source.reference.name == reference.name:
+            return
+        if self.time_source:
+            self.time_source.stop()
+        self.time_source = TimeSource(reference)
+        if self.display_mode == "minutes":
+            self.time_source.min_poll_interval = LOW_POWER_TIME_POLL_INTERVAL
+        self.time_source.start()
+        print(f"Time source: {reference.name}")
+    
+    def show_time_report(self):
+        report = self.time_source.report()
+        print(report)
+        messagebox.showinfo("SecClock Time Sync", report)
+    
+    def effective_display_mode(self):
+        """seconds or minutes; timers always need seconds, auto follows battery and idle state"""
+        if self.timer:
+            return "seconds"
+        mode = self.settings.get("display_mode")
+        if mode == "auto":
+            return "minutes" if on_battery_power() or idle_seconds() >= LOW_POWER_IDLE_SECONDS else "seconds"
+        return mode if mode in ("seconds", "minutes") else "seconds"
+    
+    def _update_display_mode(self, force=False):
+        now = time.perf_counter()
+        # Minutes mode only wakes once a minute anyway; in seconds mode don't poll the OS every tick
+        if (not force and self.display_mode is not None and self.show_seconds
+                and now - self.power_checked_at < POWER_CHECK_INTERVAL):
+            return
+        self.power_checked_at = now
+        mode = self.effective_display_mode()
+        if mode == self.display_mode:
+            return
+        print(f"Display mode: {mode}")
+        self.display_mode = mode
+        self.mode_stats.switch(mode)
+        self.show_seconds = mode == "seconds"
+        # The dispatcher only wakes for queued calls, so the minute tick is the only periodic Tk wakeup
+        self.time_source.min_poll_interval = 0 if self.show_seconds else LOW_POWER_TIME_POLL_INTERVAL
+        self._apply_display_layout()
+    
+    def _on_pointer_enter(self, event):
+        # Coming back to the clock: leave idle low-power mode right away instead of at the next minute
+        if not self.show_seconds:
+            self._update_display_mode(force=True)
+            if self.show_seconds:
+                self._restart_tick()
+    
+    def show_memory_report(self):
+        report = MEMORY_BUDGET.report()
+        print(f"Memory usage:\n{report}")
+        messagebox.showinfo("SecClock Memory Usage", report)
+    
+    def show_provider_report(self):
+        report = self.rotation.report()
+        print(f"Background sources:\n{report}")
+        messagebox.showinfo("SecClock Background Sources", report)
+    
+    def show_power_report(self):
+        report = self.mode_stats.report()
+        print(f"Power usage by display mode:\n{report}")
+        messagebox.showinfo("SecClock Power Usage", report)
+    
+    def _restart_tick(self):
+        """Run the next tick now instead of waiting out the current (possibly 200 ms) delay"""
+        if self._tick_after_id:
+            self.root.after_cancel(self._tick_after_id)
+        self._tick()
     
-    def _change_background(self):
+    def setup_timer(self):
+        """Create the stopwatch/countdown for the configured mode; keeps a running timer if nothing changed"""
+        mode = self.settings.get("clock_mode")
+        config = (mode, self.settings.get("timer_precision"), self.settings.get("countdown_seconds"))
+        if config == self.timer_config:
+            return
+        if self.timer and self.timer.running:
+            self.timer.pause()
+            self._on_timer_stopped()
+        self.timer_config = config
+        if mode in ("stopwatch", "countdown"):
+            self.timer = StopwatchTimer(*config)
+        else:
+            self.timer = None
+    
+    def toggle_timer(self):
+        if not self.timer:
+            return
+        self.timer.toggle()
+        if self.timer.running:
+            self.frame_pacer.reset()
+            self._set_high_res_timer(True)
+        else:
+            self._on_timer_stopped()
+        self._restart_tick()
+    
+    def reset_timer(self):
+        if not self.timer:
+            return
+        if self.timer.running:
+            self._on_timer_stopped()
+        self.timer.reset()
+        self._restart_tick()
+    
+    def _on_timer_stopped(self):
+        self.frame_pacer.report()
+        self._set_high_res_timer(False)
+    
+    def _set_high_res_timer(self, enabled):
+        """Windows after() granularity is ~15.6 ms; ask for 1 ms while a timer animates"""
+        if enabled == self.high_res_timer:
+            return
         try:
-            IMG_URLS = [
-                "https://picsum.photos/800/600",
-                "https://loremflickr.com/800/600/nature", 
-                "https://picsum.photos/seed/pic1/800/600",
-            ]
-            
-            if self.custom_bg_images:
-                # Cycle through custom backgrounds
-                current_index = 0
-                if hasattr(self, 'current_custom_bg_index'):
-                    current_index = (self.current_custom_bg_index + 1) % len(self.custom_bg_images)
-                else:
-                    self.current_custom_bg_index = 0
-                
-                self.current_custom_bg_index = current_index
-                new_bg = self.load_local_image(self.custom_bg_images[current_index])
+            import ctypes
+            if enabled:
+                ctypes.windll.winmm.timeBeginPeriod(1)
             else:
-                # Cycle through online backgrounds
-                self.url_index = (self.url_index + 1) % len(IMG_URLS)
-                new_bg = self.download_image(IMG_URLS[self.url_index])
-                self.current_bg_url = IMG_URLS[self.url_index]
-                self.settings.set("current_bg_url", self.current_bg_url)
-            
-            if new_bg:
-                self.bg = new_bg
-                self.root.after(0, lambda: self.canvas.itemconfig(self.bg_item, image=self.bg))
-        except Exception as ex:
-            print("Background load failed:", ex)
+                ctypes.windll.winmm.timeEndPeriod(1)
+            self.high_res_timer = enabled
+        except Exception as e:
+            print(f"Timer resolution change failed: {e}")
+    
+    def change_background_threaded(self):
+        """Ask the rotation for the next background; providers fetch and decode on the workers"""
+        load = partial(self._fetch_background, contrast_args=self.contrast_args())
+        future = self.rotation.fetch(self.SIZE, load, self.dispatcher.executor)
+        future.add_done_callback(lambda done: self.dispatcher.submit(self._on_background_fetched, done))
+    
+    def _fetch_background(self, source, refresh, size, opener, contrast_args=None):
+        """Worker thread: PIL work only, no Tk objects and no shared state. Returns (masked image, digit style)"""
+        image = self.masked_background(source, refresh=refresh, size=size, opener=opener)
+        # Analysed here, once per background, so the Tk thread and the clock tick never pay for it
+        style = cached_digit_style(source, image, *contrast_args, refresh=refresh) if contrast_args else None
+        return image, style
+    
+    def _on_background_fetched(self, future):
+        """Tk thread: apply a completed background fetch"""
+        try:
+            provider, source, (image, style) = future.result()
+        except Exception as e:
+            print(f"Background change failed: {e}")
+            return
+        if image.size != self.SIZE:
+            # Window was resized while this was loading
+            image = self.masked_background(source, opener=provider.fetch)
+            style = None
+        if style is None or self.contrast_args() is None:
+            # Auto contrast off (or toggled while this was loading)
+            style = self.digit_style_for(source, image)
+        self.current_bg_url = source
+        self.settings.set("current_bg_url", self.current_bg_url)
+        self.show_background(ImageTk.PhotoImage(image), image)
+        self._restyle_clock(style)
+    
+    def _restyle_clock(self, style):
+        """Rebuild the clock items when the new background calls for a different digit style"""
+        if style == self.digit_style:
+            return
+        self.digit_style = style
+        self.canvas.delete("clock")
+        self._create_separated_clock()
+    
+    def show_background(self, photo, image):
+        """Switch bg_item to a new background, crossfading from the current one when enabled"""
+        self.cancel_transition()
+        if (self.settings.get("crossfade_backgrounds") and self.bg_image is not None
+                and image is not None and image.size == self.bg_image.size == self.SIZE):
+            self.transition = CrossfadeTransition(self.bg_image, image, self.settings.get("crossfade_duration_ms"))
+            self.transition_target = (photo, image)
+            self.transition_photo = ImageTk.PhotoImage(self.bg_image)
+            self.canvas.itemconfig(self.bg_item, image=self.transition_photo)
+            MEMORY_BUDGET.track("transition", "crossfade", self.transition.nbytes() + estimate_nbytes(self.transition_photo))
+            self.transition.start()
+            self.root.after(int(self.transition.interval * 1000), self._transition_tick)
+        else:
+            self._set_background(photo, image)
+    
+    def _set_background(self, photo, image):
+        self.bg = photo
+        self.bg_image = image
+        self.canvas.itemconfig(self.bg_item, image=self.bg)
+        self._track_current_background()
+    
+    def _track_current_background(self):
+        # Not releasable: on screen, so the budget can count it but not release it. The PIL image is usually
+        # also the asset_cache entry; then that entry is pinned instead of counting the same bytes twice
+        image = self.bg_image
+        key = ("background", self.current_bg_url, image.size) if image is not None else None
+        cached = key is not None and self.asset_cache.get(key) is image
+        self._pin("background", self.asset_cache, key if cached else None)
+        nbytes = estimate_nbytes(self.bg) + (0 if cached else estimate_nbytes(image))
+        MEMORY_BUDGET.track("current_background", "bg", nbytes)
+    
+    def _transition_tick(self):
+        transition = self.transition
+        if transition is None:
+            return
+        frame = transition.next_frame()
+        if frame is not None:
+            started = time.perf_counter()
+            self.transition_photo.paste(frame)
+            if time.perf_counter() - started > transition.budget:
+                transition.reduce_steps()
+        if transition.done or transition.timed_out:
+            # Timed out on a struggling machine: cut to the final image rather than freezing
+            transition.report()
+            self.transition = None
+            self.transition_photo = None
+            MEMORY_BUDGET.untrack("transition", "crossfade")
+            self._set_background(*self.transition_target)
+            return
+        self.root.after(int(transition.interval * 1000), self._transition_tick)
+    
+    def cancel_transition(self):
+        if self.transition is not None:
+            self.transition.cancel()
+            self.transition = None
+            self.transition_photo = None
+            MEMORY_BUDGET.untrack("transition", "crossfade")
     
     def show_settings(self):
         try:
-            SettingsWindow(self)
+            self.settings_window = SettingsWindow(self)
         except Exception as e:
             print(f"Error opening settings: {e}")
     
@@ -615,8 +2789,16 @@ class SecClock:
             print(f"Error showing from tray: {e}")
     
     def quit_app(self):
-        """Safely quit application"""
+        """Safely quit application (Tk thread only; the tray goes through the dispatcher)"""
         try:
+            self.dispatcher.stop()
+            self.dispatcher.report()
+            print(f"Power usage by display mode:\n{self.mode_stats.report()}")
+            print(f"Memory usage:\n{MEMORY_BUDGET.report()}")
+            print(f"Background sources:\n{self.rotation.report()}")
+            print(f"Time source:\n{self.time_source.report()}")
+            self.time_source.stop()
+            self.cancel_transition()
             if hasattr(self, 'tray_icon'):
                 self.tray_icon.stop()
             self.root.quit()
@@ -626,10 +2808,15 @@ class SecClock:
             os._exit(0)
     
     def setup_tray_icon(self):
+        if pystray is None or not self.desktop:
+            print("Tray icon disabled")
+            return
         try:
             # Create a simple icon if the file doesn't exist
             if os.path.exists(ICON_PATH):
-                image = Image.open(ICON_PATH)
+                # Decode only the tray-sized frame, not the 256x256 one
+                with Image.open(ICON_PATH) as ico:
+                    image = ico.ico.getimage((64, 64)) if hasattr(ico, "ico") else ico.copy()
             else:
                 # Create a simple default icon
                 image = Image.new('RGB', (64, 64), '#333333')
@@ -638,12 +2825,20 @@ class SecClock:
                 print("Created fallback tray icon")
             
             menu = (
-                item('Show SecClock', lambda: self.show_from_tray()),
-                item('Settings', lambda: self.show_settings()),
-                item('Exit', lambda: self.quit_app())
+                # pystray calls these on its own thread: hand everything to the Tk thread
+                item('Show SecClock', lambda: self.dispatcher.submit(self.show_from_tray)),
+                item('Settings', lambda: self.dispatcher.submit(self.show_settings)),
+                item('Start/Pause Timer', lambda: self.dispatcher.submit(self.toggle_timer)),
+                item('Reset Timer', lambda: self.dispatcher.submit(self.reset_timer)),
+                item('Power Usage', lambda: self.dispatcher.submit(self.show_power_report)),
+                item('Memory Usage', lambda: self.dispatcher.submit(self.show_memory_report)),
+                item('Background Sources', lambda: self.dispatcher.submit(self.show_provider_report)),
+                item('Time Sync', lambda: self.dispatcher.submit(self.show_time_report)),
+                item('Exit', lambda: self.dispatcher.submit(self.quit_app))
             )
             
             self.tray_icon = pystray.Icon("SecClock", image, "SecClock", menu)
+            MEMORY_BUDGET.track("tray", "icon", estimate_nbytes(image))
             
             # Start tray icon in separate thread
             tray_thread = threading.Thread(target=self.tray_icon.run, daemon=True)
@@ -661,8 +2856,7 @@ class SettingsWindow:
         
         self.window = tk.Toplevel(parent.root)
         self.window.title("SecClock Settings")
-        self.window.geometry("500x650")  # Fixed height, no scrolling needed
-        self.window.resizable(False, False)  # Not resizable
+        self.window.resizable(False, False)  # Not resizable; sized to the tallest tab
         
         # Set window icon
         try:
@@ -672,15 +2866,21 @@ class SettingsWindow:
             pass
         
         self.window.transient(parent.root)
-        self.window.grab_set()
+        try:
+            self.window.grab_set()
+        except tk.TclError:
+            # X11 refuses a grab until the window is mapped
+            self.window.wait_visibility()
+            self.window.grab_set()
+        self.window.bind("<Destroy>", self.on_destroy)
         
         # Apply ONLY background and foreground colors
         self.window.configure(bg=SETTINGS_BG)
         
+        self.create_widgets()
+        
         # Center the settings window on screen
         self.center_on_screen()
-        
-        self.create_widgets()
     
     def center_on_screen(self):
         """Center the window on the screen"""
@@ -694,9 +2894,9 @@ class SettingsWindow:
         window_width = self.window.winfo_width()
         window_height = self.window.winfo_height()
         
-        # Calculate position
-        x = (screen_width - window_width) // 2
-        y = (screen_height - window_height) // 2
+        # Calculate position (top-left stays on screen even if the window is taller than it)
+        x = max(0, (screen_width - window_width) // 2)
+        y = max(0, (screen_height - window_height) // 2)
         
         # Set position
         self.window.geometry(f"+{x}+{y}")
@@ -704,72 +2904,170 @@ class SettingsWindow:
         # Main content frame with padding
         main_frame = ttk.Frame(self.window, padding="20")
         main_frame.pack(fill="both", expand=True)
+        main_frame.columnconfigure(0, weight=1)
+        
+        # Options are grouped in tabs so the window stays short enough for small screens
+        notebook = ttk.Notebook(main_frame)
+        notebook.grid(row=0, column=0, sticky="nsew")
+        display_tab = ttk.Frame(notebook, padding="10")
+        background_tab = ttk.Frame(notebook, padding="10")
+        clock_tab = ttk.Frame(notebook, padding="10")
+        advanced_tab = ttk.Frame(notebook, padding="10")
+        notebook.add(display_tab, text="Display")
+        notebook.add(background_tab, text="Background")
+        notebook.add(clock_tab, text="Clock")
+        notebook.add(advanced_tab, text="Advanced")
 
         # Window Size Section
-        ttk.Label(main_frame, text="Window Size:", font=("Arial", 10, "bold")).grid(row=0, column=0, sticky="w", pady=(0, 10))
+        ttk.Label(display_tab, text="Window Size:", font=("Arial", 10, "bold")).grid(row=0, column=0, sticky="w", pady=(0, 10))
         
-        # Size preset dropdown
-        ttk.Label(main_frame, text="Size:").grid(row=1, column=0, sticky="w", pady=5)
+        # Size preset dropdown (custom uses the width below)
+        ttk.Label(display_tab, text="Size:").grid(row=1, column=0, sticky="w", pady=5)
+        size_frame = ttk.Frame(display_tab)
+        size_frame.grid(row=1, column=1, sticky="w", pady=5)
         self.size_var = tk.StringVar(value=self.settings.get("window_size"))
-        size_combo = ttk.Combobox(main_frame, textvariable=self.size_var, 
-                                values=list(SIZE_PRESETS.keys()), 
-                                state="readonly", width=15)
-        size_combo.grid(row=1, column=1, sticky="w", pady=5)
-        
-        # Display current size
-        current_size = SIZE_PRESETS[self.size_var.get()]
-        size_label = ttk.Label(main_frame, text=f"Current: {current_size[0]}x{current_size[1]}", 
-                            font=("Arial", 8), foreground="#888888")
-        size_label.grid(row=2, column=0, columnspan=2, sticky="w", pady=(0, 10))
+        size_combo = ttk.Combobox(size_frame, textvariable=self.size_var, 
+                                values=list(SIZE_PRESETS.keys()) + ["custom"], 
+                                state="readonly", width=10)
+        size_combo.pack(side="left", padx=(0, 5))
+        ttk.Label(size_frame, text="Width:").pack(side="left", padx=(0, 5))
+        self.width_var = tk.StringVar(value=str(base_width_for(self.settings)))
+        ttk.Spinbox(size_frame, from_=MIN_WINDOW_WIDTH, to=MAX_WINDOW_WIDTH, increment=20,
+                    textvariable=self.width_var, width=7).pack(side="left")
+        
+        # DPI scale (auto follows the display)
+        ttk.Label(display_tab, text="DPI Scale:").grid(row=2, column=0, sticky="w", pady=(0, 10))
+        scale_frame = ttk.Frame(display_tab)
+        scale_frame.grid(row=2, column=1, sticky="w", pady=(0, 10))
+        self.dpi_scale_var = tk.StringVar(value=str(self.settings.get("dpi_scale")))
+        ttk.Combobox(scale_frame, textvariable=self.dpi_scale_var,
+                     values=["auto", "1.0", "1.25", "1.5", "1.75", "2.0", "3.0"], width=10).pack(side="left", padx=(0, 5))
+        
+        # Display resulting size
+        size_label = ttk.Label(scale_frame, font=("Arial", 8), foreground="#888888")
+        size_label.pack(side="left")
         
         # Update size label when selection changes
         def update_size_label(*args):
-            new_size = SIZE_PRESETS[self.size_var.get()]
-            size_label.config(text=f"Current: {new_size[0]}x{new_size[1]}")
-        self.size_var.trace('w', update_size_label)
+            try:
+                new_size = self.selected_window_size()
+                size_label.config(text=f"Current: {new_size[0]}x{new_size[1]}")
+            except ValueError:
+                size_label.config(text="Current: invalid")
+        
+        def on_preset_selected(*args):
+            if self.size_var.get() in SIZE_PRESETS:
+                self.width_var.set(str(SIZE_PRESETS[self.size_var.get()][0]))
+            update_size_label()
+        
+        def on_width_changed(*args):
+            try:
+                width = int(self.width_var.get())
+            except ValueError:
+                width = None
+            if self.size_var.get() in SIZE_PRESETS and width != SIZE_PRESETS[self.size_var.get()][0]:
+                self.size_var.set("custom")
+            update_size_label()
+        
+        self.size_var.trace('w', on_preset_selected)
+        self.width_var.trace('w', on_width_changed)
+        self.dpi_scale_var.trace('w', update_size_label)
+        update_size_label()
         
         # Separator
-        separator1 = ttk.Separator(main_frame, orient="horizontal")
+        separator1 = ttk.Separator(display_tab, orient="horizontal")
         separator1.grid(row=3, column=0, columnspan=2, sticky="ew", pady=15)
         
         # Font Size
-        ttk.Label(main_frame, text="Font Size:").grid(row=4, column=0, sticky="w", pady=5)
+        ttk.Label(display_tab, text="Font Size:").grid(row=4, column=0, sticky="w", pady=5)
         self.font_size_var = tk.StringVar(value=str(self.settings.get("font_size")))
-        font_size_spin = ttk.Spinbox(main_frame, from_=20, to=100, textvariable=self.font_size_var, width=10)
+        font_size_spin = ttk.Spinbox(display_tab, from_=20, to=100, textvariable=self.font_size_var, width=10)
         font_size_spin.grid(row=4, column=1, sticky="w", pady=5)
         
         # Font Color
-        ttk.Label(main_frame, text="Font Color:").grid(row=5, column=0, sticky="w", pady=5)
+        ttk.Label(display_tab, text="Font Color:").grid(row=5, column=0, sticky="w", pady=5)
         self.font_color_var = tk.StringVar(value=self.settings.get("font_color"))
-        color_frame = ttk.Frame(main_frame)
+        color_frame = ttk.Frame(display_tab)
         color_frame.grid(row=5, column=1, sticky="w", pady=5)
         color_entry = ttk.Entry(color_frame, textvariable=self.font_color_var, width=10)
         color_entry.pack(side="left", padx=(0, 5))
         color_btn = ttk.Button(color_frame, text="Pick", command=self.pick_color)
         color_btn.pack(side="left")
         
+        # Display mode (minutes = low-power HH:MM)
+        ttk.Label(display_tab, text="Display:").grid(row=6, column=0, sticky="w", pady=5)
+        self.display_mode_var = tk.StringVar(value=self.settings.get("display_mode"))
+        ttk.Combobox(display_tab, textvariable=self.display_mode_var, values=DISPLAY_MODES,
+                     state="readonly", width=11).grid(row=6, column=1, sticky="w", pady=5)
+        
+        # Auto contrast: digit color / outline / shadow picked per background
+        ttk.Label(display_tab, text="Auto Contrast:").grid(row=7, column=0, sticky="w", pady=5)
+        contrast_frame = ttk.Frame(display_tab)
+        contrast_frame.grid(row=7, column=1, sticky="w", pady=5)
+        self.auto_contrast_var = tk.BooleanVar(value=self.settings.get("auto_contrast"))
+        ttk.Checkbutton(contrast_frame, variable=self.auto_contrast_var).pack(side="left", padx=(0, 5))
+        self.contrast_style_var = tk.StringVar(value=self.settings.get("contrast_style"))
+        ttk.Combobox(contrast_frame, textvariable=self.contrast_style_var, values=CONTRAST_STYLES,
+                     state="readonly", width=11).pack(side="left")
+        
         # Custom Background
-        ttk.Label(main_frame, text="Custom Background:").grid(row=6, column=0, sticky="w", pady=5)
-        bg_frame = ttk.Frame(main_frame)
-        bg_frame.grid(row=6, column=1, sticky="w", pady=5)
+        ttk.Label(background_tab, text="Custom Background:").grid(row=0, column=0, sticky="w", pady=5)
+        bg_frame = ttk.Frame(background_tab)
+        bg_frame.grid(row=0, column=1, sticky="w", pady=5)
         self.bg_path_var = tk.StringVar(value=self.settings.get("custom_bg_image"))
         bg_entry = ttk.Entry(bg_frame, textvariable=self.bg_path_var, width=20)
         bg_entry.pack(side="left", padx=(0, 5))
         ttk.Button(bg_frame, text="Browse", command=self.browse_image).pack(side="left")
         
+        self.procedural_bg_var = tk.BooleanVar(value=self.settings.get("procedural_backgrounds"))
+        ttk.Checkbutton(background_tab, text="Include generated backgrounds in rotation", variable=self.procedural_bg_var).grid(row=1, column=0, columnspan=2, sticky="w", pady=5)
+        
+        self.crossfade_var = tk.BooleanVar(value=self.settings.get("crossfade_backgrounds"))
+        ttk.Checkbutton(background_tab, text="Crossfade when changing background", variable=self.crossfade_var).grid(row=2, column=0, columnspan=2, sticky="w", pady=5)
+        
+        # Timer mode
+        ttk.Label(clock_tab, text="Mode:").grid(row=0, column=0, sticky="w", pady=5)
+        mode_frame = ttk.Frame(clock_tab)
+        mode_frame.grid(row=0, column=1, sticky="w", pady=5)
+        self.clock_mode_var = tk.StringVar(value=self.settings.get("clock_mode"))
+        ttk.Combobox(mode_frame, textvariable=self.clock_mode_var, values=CLOCK_MODES,
+                     state="readonly", width=11).pack(side="left", padx=(0, 5))
+        self.timer_precision_var = tk.StringVar(value=self.settings.get("timer_precision"))
+        ttk.Combobox(mode_frame, textvariable=self.timer_precision_var, values=list(TIMER_PRECISIONS.keys()),
+                     state="readonly", width=11).pack(side="left")
+        
+        ttk.Label(clock_tab, text="Countdown (seconds):").grid(row=1, column=0, sticky="w", pady=5)
+        self.countdown_var = tk.StringVar(value=str(self.settings.get("countdown_seconds")))
+        ttk.Spinbox(clock_tab, from_=1, to=359999, textvariable=self.countdown_var, width=10).grid(row=1, column=1, sticky="w", pady=5)
+        
+        # World clock zones (IANA names, comma separated)
+        ttk.Label(clock_tab, text="World Zones:").grid(row=2, column=0, sticky="w", pady=5)
+        self.world_zones_var = tk.StringVar(value=", ".join(self.settings.get("world_zones")))
+        ttk.Entry(clock_tab, textvariable=self.world_zones_var, width=30).grid(row=2, column=1, sticky="w", pady=5)
+        
+        # Time reference (SNTP host[:port]; empty uses the system clock)
+        ttk.Label(clock_tab, text="Time Server:").grid(row=3, column=0, sticky="w", pady=5)
+        self.time_server_var = tk.StringVar(value=self.settings.get("time_server"))
+        ttk.Entry(clock_tab, textvariable=self.time_server_var, width=30).grid(row=3, column=1, sticky="w", pady=5)
+        
         # Checkboxes
         self.remember_pos_var = tk.BooleanVar(value=self.settings.get("remember_position"))
-        ttk.Checkbutton(main_frame, text="Remember window position", variable=self.remember_pos_var).grid(row=7, column=0, columnspan=2, sticky="w", pady=5)
+        ttk.Checkbutton(advanced_tab, text="Remember window position", variable=self.remember_pos_var).grid(row=0, column=0, columnspan=2, sticky="w", pady=5)
         
         self.lock_drag_var = tk.BooleanVar(value=self.settings.get("lock_dragging"))
-        ttk.Checkbutton(main_frame, text="Lock window dragging", variable=self.lock_drag_var).grid(row=8, column=0, columnspan=2, sticky="w", pady=5)
+        ttk.Checkbutton(advanced_tab, text="Lock window dragging", variable=self.lock_drag_var).grid(row=1, column=0, columnspan=2, sticky="w", pady=5)
         
         self.run_startup_var = tk.BooleanVar(value=self.settings.get("run_on_startup"))
-        ttk.Checkbutton(main_frame, text="Run on system startup", variable=self.run_startup_var).grid(row=9, column=0, columnspan=2, sticky="w", pady=5)
+        ttk.Checkbutton(advanced_tab, text="Run on system startup", variable=self.run_startup_var).grid(row=2, column=0, columnspan=2, sticky="w", pady=5)
+        
+        # Memory budget (0 = unlimited)
+        ttk.Label(advanced_tab, text="Memory Budget (MB):").grid(row=3, column=0, sticky="w", pady=5)
+        self.memory_budget_var = tk.StringVar(value=str(self.settings.get("memory_budget_mb")))
+        ttk.Spinbox(advanced_tab, from_=0, to=4096, increment=8, textvariable=self.memory_budget_var, width=10).grid(row=3, column=1, sticky="w", pady=5)
         
         # Buttons
         btn_frame = ttk.Frame(main_frame)
-        btn_frame.grid(row=10, column=0, columnspan=2, pady=20)
+        btn_frame.grid(row=1, column=0, pady=20)
         
         ttk.Button(btn_frame, text="Apply", command=self.apply_settings).pack(side="left", padx=5)
         ttk.Button(btn_frame, text="OK", command=self.ok_settings).pack(side="left", padx=5)
@@ -777,11 +3075,11 @@ class SettingsWindow:
         
         # Separator
         separator2 = ttk.Separator(main_frame, orient="horizontal")
-        separator2.grid(row=11, column=0, columnspan=2, sticky="ew", pady=20)
+        separator2.grid(row=2, column=0, sticky="ew", pady=(0, 20))
         
         # Author Section
         author_frame = ttk.Frame(main_frame)
-        author_frame.grid(row=12, column=0, columnspan=2, pady=10)
+        author_frame.grid(row=3, column=0, pady=10)
         
         # Made with love text
         author_label = ttk.Label(
@@ -808,9 +3106,11 @@ class SettingsWindow:
         for platform, tooltip in social_buttons:
             try:
                 # Load and resize icon to 80x80
-                icon_img = Image.open(SOCIAL_ICONS[platform])
-                icon_img = icon_img.resize((80, 80), Image.LANCZOS)
-                self.social_icons[platform] = ImageTk.PhotoImage(icon_img)
+                with Image.open(SOCIAL_ICONS[platform]) as icon_img:
+                    if icon_img.size != (80, 80):
+                        icon_img = icon_img.resize((80, 80), Image.LANCZOS)
+                    self.social_icons[platform] = ImageTk.PhotoImage(icon_img)
+                MEMORY_BUDGET.track("settings_icons", platform, estimate_nbytes(self.social_icons[platform]))
                 
                 # Using default button style
                 btn = tk.Button(
@@ -845,6 +3145,14 @@ class SettingsWindow:
                 btn.pack(side="left", padx=5)
                 self.create_tooltip(btn, tooltip)      
         
+    def on_destroy(self, event):
+        # <Destroy> fires for every child too; only act for the window itself
+        if event.widget is not self.window:
+            return
+        for platform in self.social_icons:
+            MEMORY_BUDGET.untrack("settings_icons", platform)
+        self.social_icons = {}
+    
     def create_tooltip(self, widget, text):
         def on_enter(event):
             tooltip = tk.Toplevel()
@@ -888,52 +3196,81 @@ class SettingsWindow:
         if filename:
             self.bg_path_var.set(filename)
     
+    def selected_dpi_scale(self):
+        value = self.dpi_scale_var.get().strip()
+        if value == "auto":
+            return value
+        return max(0.5, min(4.0, float(value)))
+    
+    def selected_window_size(self):
+        """Window size the current Size / Width / DPI Scale fields would produce"""
+        preset = self.size_var.get()
+        width = SIZE_PRESETS[preset][0] if preset in SIZE_PRESETS else int(self.width_var.get())
+        return window_size_for(width, self.parent.detect_dpi_scale(self.selected_dpi_scale()))
+    
     def apply_settings(self):
+        started = time.perf_counter()
+        font_mark = FONT_SERVICE.mark()
         try:
             # Get new window size preset
             new_size_preset = self.size_var.get()
-            if new_size_preset not in SIZE_PRESETS:
+            if new_size_preset not in SIZE_PRESETS and new_size_preset != "custom":
                 messagebox.showerror("Error", "Invalid window size selected")
                 return
+            try:
+                new_width = int(self.width_var.get())
+                new_dpi_scale = self.selected_dpi_scale()
+            except ValueError:
+                messagebox.showerror("Error", "Invalid window width or DPI scale")
+                return
+            time_server = self.time_server_var.get().strip()
+            if time_server:
+                try:
+                    parse_time_server(time_server)
+                except ValueError as e:
+                    messagebox.showerror("Error", f"Invalid time server: {e}")
+                    return
             
             # Save settings
             self.settings.set("window_size", new_size_preset)
+            if new_size_preset == "custom":
+                self.settings.set("window_width", max(MIN_WINDOW_WIDTH, min(MAX_WINDOW_WIDTH, new_width)))
+            self.settings.set("dpi_scale", new_dpi_scale)
             self.settings.set("font_size", int(self.font_size_var.get()))
             self.settings.set("font_color", self.font_color_var.get())
             self.settings.set("custom_bg_image", self.bg_path_var.get())
             self.settings.set("remember_position", self.remember_pos_var.get())
             self.settings.set("lock_dragging", self.lock_drag_var.get())
             self.settings.set("run_on_startup", self.run_startup_var.get())
+            self.settings.set("procedural_backgrounds", self.procedural_bg_var.get())
+            self.settings.set("crossfade_backgrounds", self.crossfade_var.get())
+            self.settings.set("display_mode", self.display_mode_var.get())
+            self.settings.set("memory_budget_mb", max(0, int(self.memory_budget_var.get())))
+            self.settings.set("auto_contrast", self.auto_contrast_var.get())
+            self.settings.set("contrast_style", self.contrast_style_var.get())
+            self.settings.set("clock_mode", self.clock_mode_var.get())
+            self.settings.set("timer_precision", self.timer_precision_var.get())
+            self.settings.set("countdown_seconds", int(self.countdown_var.get()))
+            self.settings.set("world_zones", [zone.strip() for zone in self.world_zones_var.get().split(",") if zone.strip()])
+            self.settings.set("time_server", time_server)
             
             # Update startup registry
             self.update_startup_registry()
             
-            # Update parent window size and reload everything
-            new_size = SIZE_PRESETS[new_size_preset]
-            self.parent.SIZE = new_size
-            self.parent.current_size_preset = new_size_preset
-            x = self.parent.root.winfo_x()
-            y = self.parent.root.winfo_y()
-            self.parent.root.geometry(f"{new_size[0]}x{new_size[1]}+{x}+{y}")
-            
             # Reload parent with new settings
-            self.parent.load_custom_font()
-            self.parent.load_custom_background()
-            
-            # Clear canvas and resize
-            self.parent.canvas.delete("all")
-            self.parent.canvas.config(width=new_size[0], height=new_size[1])
-            
-            # Force reload background with new size
-            self.parent.load_current_background()
+            MEMORY_BUDGET.configure(self.settings.get("memory_budget_mb"))
+            self.parent.load_background_providers()
+            self.parent.setup_timer()
+            self.parent.setup_world_clock()
+            self.parent.setup_time_source()
             
-            # Recreate clock
-            self.parent._create_separated_clock()
+            # Resize and rebuild (cached per size, so nothing is downloaded again)
+            self.parent.dpi_scale = self.parent.detect_dpi_scale()
+            self.parent.resize_window(self.parent.compute_window_size())
             
-            # Update button positions
-            self.parent.settings_btn.place(x=10, y=10, width=25, height=25)
-            self.parent.close_btn.place(x=new_size[0]-35, y=10, width=25, height=25)
-            self.parent.bg_btn.place(x=new_size[0]-70, y=10, width=25, height=25)
+            # Display mode or timer may have changed: re-evaluate now and reschedule the tick
+            self.parent._update_display_mode(force=True)
+            self.parent._restart_tick()
             
             # Update dragging
             if self.settings.get("lock_dragging"):
@@ -944,7 +3281,9 @@ class SettingsWindow:
                 self.parent._drag_dy = 0
                 self.parent.canvas.bind("<Button-1>", self.parent._start_drag)
                 self.parent.canvas.bind("<B1-Motion>", self.parent._on_drag)
-                
+            
+            print(f"Settings applied in {(time.perf_counter() - started) * 1000:.0f} ms "
+                  f"(font parsing {FONT_SERVICE.load_time_since(font_mark) * 1000:.2f} ms)")
             messagebox.showinfo("Success", "Settings applied successfully!")
             
         except Exception as e:
@@ -955,6 +3294,8 @@ class SettingsWindow:
         self.window.destroy()
 
     def update_startup_registry(self):
+        if win32api is None or not self.parent.desktop:
+            return
         try:
             app_path = sys.executable
             script_path = os.path.join(BASE_DIR, "main.py")
@@ -978,7 +3319,245 @@ class SettingsWindow:
         except Exception as e:
             print(f"Startup registry error: {e}")
 
+class FaceRenderer:
+    """Headless renderer for the clock face (masked background + HH:MM:SS), no Tk needed"""
+    def __init__(self, settings, width=None):
+        self.settings = settings
+        self.SIZE = window_size_for(width or base_width_for(settings))
+        self.color = settings.get("font_color")
+        try:
+            self.font = FONT_SERVICE.face(scaled(settings.get("font_size"), self.SIZE), settings.get("font_subsetting"))
+        except Exception as e:
+            print(f"Error loading custom font: {e}")
+            self.font = None
+        self.background = self.load_background()
+        self.style = (self.color, None, None)
+        if settings.get("auto_contrast"):
+            self.style = cached_digit_style(self.background_source, self.background, self.font,
+                                            self.color, settings.get("contrast_style"))
+        self.glyphs = {}
+        # One frame buffer, repainted in place every second
+        self.frame = Image.new("RGBA", self.SIZE, (0, 0, 0, 0))
+    
+    def load_background(self):
+        rotation = build_rotation(self.settings)
+        try:
+            provider, self.background_source = rotation.locate(self.settings.get("current_bg_url"))
+            return prepare_background(provider.fetch(self.background_source, self.SIZE), self.SIZE)
+        except Exception as e:
+            print(f"Error loading stream background: {e} - using generated fallback")
+            self.background_source = procedural_source("noise")
+            return prepare_background(open_image_source(self.background_source, self.SIZE), self.SIZE)
+    
+    def glyph(self, text, fixed_width=None):
+        # Only 00-59 and ":" are ever drawn, so this never grows past ~61 entries
+        if text not in self.glyphs:
+            color, outline, shadow = self.style
+            self.glyphs[text] = render_text_image(text, self.font, color, fixed_width, outline, shadow)
+        return self.glyphs[text]
+    
+    def render(self, hours, minutes, seconds):
+        """Paint the face for the given time into the shared frame buffer and return it"""
+        colon = self.glyph(":", fixed_width=scaled(20, self.SIZE))
+        parts = [self.glyph(hours), colon, self.glyph(minutes), colon, self.glyph(seconds)]
+        centers = layout_separated_clock([part.width for part in parts], self.SIZE)
+        center_y = self.SIZE[1] // 2
+        
+        self.frame.paste(self.background, (0, 0))
+        for part, center_x in zip(parts, centers):
+            dest = (center_x - part.width // 2, center_y - part.height // 2)
+            if dest[0] < 0 or dest[1] < 0:
+                # Oversized font: clip instead of failing the frame
+                self.frame.paste(part, dest, part)
+            else:
+                self.frame.alpha_composite(part, dest)
+        return self.frame
+
+class MJPEGSink:
+    """Serves frames as multipart/x-mixed-replace JPEG on a local HTTP port"""
+    BOUNDARY = "secclockframe"
+    
+    def __init__(self, size, host=STREAM_HOST, port=STREAM_PORT, quality=90):
+        self.quality = quality
+        self.jpeg = None
+        self.sequence = 0
+        self.condition = threading.Condition()
+        # Reused encode buffers
+        self.matte = Image.new("RGB", size, STREAM_MATTE)
+        self.matte_fill = Image.new("RGB", size, STREAM_MATTE)
+        self.buffer = io.BytesIO()
+        
+        sink = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/stream.mjpg"):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={MJPEGSink.BOUNDARY}")
+                self.send_header("Cache-Control", "no-cache, private")
+                self.end_headers()
+                sequence = -1
+                try:
+                    while True:
+                        jpeg, sequence = sink.wait_for_frame(sequence)
+                        self.wfile.write(
+                            f"--{MJPEGSink.BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                            f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg + b"\r\n"
+                        )
+                except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+                    pass
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"MJPEG stream: http://{host}:{port}/stream.mjpg")
+    
+    def wait_for_frame(self, last_sequence):
+        with self.condition:
+            self.condition.wait_for(lambda: self.jpeg is not None and self.sequence != last_sequence)
+            return self.jpeg, self.sequence
+    
+    def write(self, frame):
+        self.matte.paste(self.matte_fill, (0, 0))
+        self.matte.paste(frame, (0, 0), frame)
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.matte.save(self.buffer, "JPEG", quality=self.quality)
+        with self.condition:
+            self.jpeg = self.buffer.getvalue()
+            self.sequence += 1
+            self.condition.notify_all()
+    
+    def close(self):
+        self.server.shutdown()
+
+class PNGSequenceSink:
+    """Writes a ring of numbered PNG frames plus an atomically replaced latest.png
+    
+    max_frames numbered files are reused in turn (frame index % max_frames); 0 writes latest.png only."""
+    def __init__(self, out_dir, max_frames=STREAM_PNG_MAX_FRAMES):
+        self.out_dir = out_dir
+        self.max_frames = max(0, max_frames)
+        self.index = 0
+        self.buffer = io.BytesIO()
+        os.makedirs(out_dir, exist_ok=True)
+        ring = f"ring of {self.max_frames} frames" if self.max_frames else "latest.png only"
+        print(f"PNG sequence: {out_dir} ({ring})")
+    
+    def write(self, frame):
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        frame.save(self.buffer, "PNG", compress_level=1)
+        data = self.buffer.getbuffer()
+        try:
+            if self.max_frames:
+                with open(os.path.join(self.out_dir, f"frame_{self.index % self.max_frames:06d}.png"), "wb") as f:
+                    f.write(data)
+            latest_tmp = os.path.join(self.out_dir, "latest.png.tmp")
+            with open(latest_tmp, "wb") as f:
+                f.write(data)
+            os.replace(latest_tmp, os.path.join(self.out_dir, "latest.png"))
+        finally:
+            data.release()
+        self.index += 1
+    
+    def close(self):
+        pass
+
+class RawRGBASink:
+    """Writes raw RGBA frames (width*height*4 bytes each) to a binary stream, e.g. stdout into ffmpeg"""
+    def __init__(self, stream):
+        self.stream = stream
+    
+    def write(self, frame):
+        self.stream.write(frame.tobytes())
+        self.stream.flush()
+    
+    def close(self):
+        try:
+            self.stream.flush()
+        except Exception:
+            pass
+
+class FrameStreamer:
+    """Renders the face headlessly and pushes a frame to the sinks only when the displayed second changes"""
+    def __init__(self, renderer, sinks, time_source):
+        self.renderer = renderer
+        self.sinks = sinks
+        self.time_source = time_source
+        self.frames = 0
+        self.stop_event = threading.Event()
+    
+    def run(self):
+        last_parts = None
+        try:
+            while not self.stop_event.is_set():
+                parts = self.time_source.local_parts()
+                if parts != last_parts:
+                    frame = self.renderer.render(*parts)
+                    for sink in self.sinks:
+                        sink.write(frame)
+                    last_parts = parts
+                    self.frames += 1
+                # Sleep until just past the next second boundary
+                self.stop_event.wait(self.time_source.ms_until_next(1) / 1000)
+        except (KeyboardInterrupt, BrokenPipeError):
+            pass
+        finally:
+            for sink in self.sinks:
+                sink.close()
+            print(f"Streamer stopped after {self.frames} frames")
+    
+    def stop(self):
+        self.stop_event.set()
+
+def run_stream(args):
+    """Headless entry point: python main.py --stream mjpeg|png|raw"""
+    raw_out = None
+    if args.stream == "raw":
+        # stdout carries the frames, so route all logging to stderr
+        raw_out = sys.stdout.buffer
+        sys.stdout = sys.stderr
+    
+    settings = SettingsManager()
+    width = SIZE_PRESETS[args.size][0] if args.size in SIZE_PRESETS else args.width
+    renderer = FaceRenderer(settings, width)
+    if args.stream == "mjpeg":
+        sink = MJPEGSink(renderer.SIZE, args.host, args.port)
+    elif args.stream == "png":
+        sink = PNGSequenceSink(args.out or os.path.join(BASE_DIR, "frames"), args.max_frames)
+    else:
+        sink = RawRGBASink(raw_out)
+    time_source = TimeSource(time_reference_for(settings))
+    time_source.start()
+    print(f"Streaming {renderer.SIZE[0]}x{renderer.SIZE[1]} RGBA frames ({args.stream}), time from {time_source.reference.name}")
+    FrameStreamer(renderer, [sink], time_source).run()
+    time_source.stop()
+    print(time_source.report())
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SecClock")
+    parser.add_argument("--stream", choices=["mjpeg", "png", "raw"],
+                        help="Run headless and stream clock frames instead of opening the window")
+    parser.add_argument("--size", choices=list(SIZE_PRESETS.keys()), help="Frame size preset for --stream")
+    parser.add_argument("--width", type=int, help="Frame width for --stream (height keeps the 16:9 ratio)")
+    parser.add_argument("--host", default=STREAM_HOST, help="MJPEG listen address")
+    parser.add_argument("--port", type=int, default=STREAM_PORT, help="MJPEG listen port")
+    parser.add_argument("--out", help="Output directory for --stream png")
+    parser.add_argument("--max-frames", type=int, default=STREAM_PNG_MAX_FRAMES,
+                        help=f"--stream png keeps this many numbered frames, overwriting the oldest "
+                             f"(default {STREAM_PNG_MAX_FRAMES}); 0 writes only latest.png")
+    args = parser.parse_args()
+    
+    if args.stream:
+        run_stream(args)
+        sys.exit(0)
+    
     # Create necessary directories
     os.makedirs(os.path.join(BASE_DIR, "assets"), exist_ok=True)
     os.makedirs(os.path.join(BASE_DIR, "fonts"), exist_ok=True)
@@ -987,9 +3566,6 @@ if __name__ == "__main__":
     print(f"Base directory: {BASE_DIR}")
     print(f"Font path: {FONT_PATH}")
     print(f"Icon path: {ICON_PATH}")
-    print("Mask paths:")
-    for size, path in MASK_PATHS.items():
-        print(f"  {size}: {path}")
     
     app = SecClock()
     print("SecClock started successfully!")
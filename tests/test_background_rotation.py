@@ -0,0 +1,185 @@
+from concurrent.futures import Future
+
+import pytest
+
+import main
+
+SIZE = (480, 270)
+
+
+class FakeProvider(main.BackgroundProvider):
+    """Provider whose fetches succeed with a label or raise, without touching images"""
+    def __init__(self, name, fail=False, cost=1.0, empty=False):
+        super().__init__(name=name, cost=cost)
+        self.fail = fail
+        self.empty = empty
+
+    def list_sources(self):
+        if self.empty:
+            return []
+        return [f"{self.name}-{index}" for index in range(3)]
+
+    def open(self, source, size):
+        if self.fail:
+            raise OSError(f"{source} unavailable")
+        return f"image:{source}"
+
+
+class ManualExecutor:
+    """Queues jobs so a test decides which fetch finishes first; run_all() finishes them in order"""
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.jobs.append((future, fn, args))
+        return future
+
+    def run(self, index):
+        future, fn, args = self.jobs.pop(index)
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+    def run_all(self):
+        while self.jobs:
+            self.run(0)
+
+
+class InlineExecutor(ManualExecutor):
+    def submit(self, fn, *args):
+        future = super().submit(fn, *args)
+        self.run(len(self.jobs) - 1)
+        return future
+
+
+def load(source, refresh, size, opener):
+    return opener(source, size)
+
+
+def rotation(providers, primary, fallback=None):
+    rotation = main.BackgroundRotation(providers, fallback)
+    rotation.choose = lambda exclude=(): primary
+    return rotation
+
+
+def test_primary_wins_and_backups_are_stocked():
+    primary, backup = FakeProvider("primary"), FakeProvider("backup")
+    rot = rotation([primary, backup], primary)
+    executor = ManualExecutor()
+    result = rot.fetch(SIZE, load, executor)
+    # The backup finishes first but must not replace the chosen provider's image
+    executor.run(1)
+    assert not result.done()
+    executor.run(0)
+    assert result.result() == (primary, "primary-0", "image:primary-0")
+    assert list(rot.ready) == [(SIZE, (backup, "backup-0", "image:backup-0"))]
+
+
+def test_backup_covers_a_failed_primary():
+    primary, backup = FakeProvider("primary", fail=True), FakeProvider("backup")
+    fallback = FakeProvider("fallback")
+    rot = rotation([primary, backup], primary, fallback)
+    result = rot.fetch(SIZE, load, InlineExecutor())
+    assert result.result() == (backup, "backup-0", "image:backup-0")
+    assert not rot.ready
+    assert fallback.stats.attempts == 0
+
+
+def test_backup_waits_for_the_primary_before_covering():
+    primary, backup = FakeProvider("primary", fail=True), FakeProvider("backup")
+    rot = rotation([primary, backup], primary)
+    executor = ManualExecutor()
+    result = rot.fetch(SIZE, load, executor)
+    executor.run(1)
+    assert not result.done()
+    executor.run(0)
+    assert result.result()[0] is backup
+
+
+def test_fallback_when_the_whole_batch_fails():
+    primary, backup = FakeProvider("primary", fail=True), FakeProvider("backup", fail=True)
+    fallback = FakeProvider("fallback")
+    rot = rotation([primary, backup], primary, fallback)
+    result = rot.fetch(SIZE, load, InlineExecutor())
+    assert result.result() == (fallback, "fallback-0", "image:fallback-0")
+
+
+def test_error_when_everything_fails_without_a_fallback():
+    primary = FakeProvider("primary", fail=True)
+    rot = rotation([primary], primary)
+    with pytest.raises(OSError):
+        rot.fetch(SIZE, load, InlineExecutor()).result()
+
+
+def test_ready_stock_is_used_for_the_chosen_provider():
+    primary, backup = FakeProvider("primary"), FakeProvider("backup")
+    rot = rotation([primary, backup], primary)
+    rot.fetch(SIZE, load, InlineExecutor()).result()
+    rot.choose = lambda exclude=(): backup
+    executor = ManualExecutor()
+    result = rot.fetch(SIZE, load, executor)
+    # Served from stock: nothing new is fetched
+    assert result.result() == (backup, "backup-0", "image:backup-0")
+    assert not executor.jobs
+    assert not rot.ready
+
+
+def test_ready_stock_covers_a_lone_failed_primary_before_the_fallback():
+    primary, backup = FakeProvider("primary"), FakeProvider("backup", cost=main.PROVIDER_BATCH_COST - 1)
+    fallback = FakeProvider("fallback")
+    rot = rotation([primary, backup], primary, fallback)
+    rot.fetch(SIZE, load, InlineExecutor()).result()
+    assert [result[0] for _, result in rot.ready] == [backup]
+    # The backup is already stocked, so this batch is only the (now failing) primary
+    primary.fail = True
+    executor = ManualExecutor()
+    result = rot.fetch(SIZE, load, executor)
+    assert len(executor.jobs) == 1
+    executor.run_all()
+    assert result.result() == (backup, "backup-0", "image:backup-0")
+    assert fallback.stats.attempts == 0
+
+
+def test_stock_for_another_size_is_dropped():
+    primary, backup = FakeProvider("primary"), FakeProvider("backup")
+    rot = rotation([primary, backup], primary)
+    rot.fetch(SIZE, load, InlineExecutor()).result()
+    rot.choose = lambda exclude=(): backup
+    executor = InlineExecutor()
+    result = rot.fetch((600, 338), load, executor)
+    assert result.result() == (backup, "backup-1", "image:backup-1")
+    assert all(size == (600, 338) for size, _ in rot.ready)
+
+
+def test_malformed_provider_specs_are_skipped():
+    settings = {"background_providers": ["https://example.com/a.jpg", {"type": "nope"}, {"type": "procedural"}],
+                "procedural_backgrounds": True}
+    providers = main.build_providers(settings)
+    assert [type(provider) for provider in providers] == [main.ProceduralProvider]
+
+
+def test_providers_without_sources_are_recorded_and_skipped():
+    primary, backup = FakeProvider("primary", empty=True), FakeProvider("backup")
+    fallback = FakeProvider("fallback")
+    rot = rotation([primary, backup], primary, fallback)
+    assert rot.fetch(SIZE, load, InlineExecutor()).result() == (backup, "backup-0", "image:backup-0")
+    assert (primary.stats.attempts, primary.stats.successes) == (1, 0)
+    # With the backup empty too, the whole batch is gone before a fetch starts
+    rot = rotation([primary, FakeProvider("backup", empty=True)], primary, fallback)
+    assert rot.fetch(SIZE, load, InlineExecutor()).result()[0] is fallback
+    with pytest.raises(LookupError):
+        rotation([primary], primary).fetch(SIZE, load, InlineExecutor()).result()
+
+
+def test_result_is_settled_outside_the_rotation_lock():
+    primary, backup = FakeProvider("primary", fail=True), FakeProvider("backup")
+    rot = rotation([primary, backup], primary)
+    executor = ManualExecutor()
+    result = rot.fetch(SIZE, load, executor)
+    # The app's done-callback hands off to the Tk thread, which may be waiting on this lock
+    held = []
+    result.add_done_callback(lambda done: held.append(rot.lock.locked()))
+    executor.run_all()
+    assert held == [False]
@@ -0,0 +1,178 @@
+import time
+
+import pytest
+
+import main
+
+MS = 1_000_000
+SECOND = 1_000_000_000
+
+
+class FakeMonotonic:
+    def __init__(self, now=10 * SECOND):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def mono(monkeypatch):
+    clock = FakeMonotonic()
+    monkeypatch.setattr(main.time, "monotonic_ns", clock)
+    return clock
+
+
+@pytest.fixture
+def source(mono):
+    source = main.TimeSource()
+    source.anchor_wall_ns = 1_000_000 * SECOND
+    source.anchor_mono_ns = mono.now
+    source.slew = (mono.now, 0, 0)
+    return source
+
+
+def test_correction_is_slewed_at_the_limit():
+    source = main.TimeSource()
+    source.slew = (0, 0, 1000 * MS)
+    rate = main.TIME_SLEW_MS_PER_SECOND * MS
+    assert source.correction_ns(0) == 0
+    assert source.correction_ns(SECOND) == rate
+    assert source.correction_ns(10 * SECOND) == 10 * rate
+    # Reaches the target and stays there
+    assert source.correction_ns(1000 * MS // rate * SECOND) == 1000 * MS
+    assert source.correction_ns(100 * SECOND) == 1000 * MS
+
+
+def test_negative_correction_is_slewed_too():
+    source = main.TimeSource()
+    source.slew = (0, 200 * MS, -200 * MS)
+    assert source.correction_ns(SECOND) == 200 * MS - main.TIME_SLEW_MS_PER_SECOND * MS
+    assert source.correction_ns(60 * SECOND) == -200 * MS
+
+
+def test_first_sample_is_stepped(source, mono):
+    source.add_sample(500 * MS, 0)
+    assert source.correction_ns(mono.now) == 500 * MS
+
+
+def test_later_samples_are_slewed_from_the_applied_correction(source, mono):
+    source.add_sample(500 * MS, 0)
+    mono.now += SECOND
+    source.add_sample(800 * MS, 0)
+    assert source.correction_ns(mono.now) == 500 * MS
+    mono.now += 2 * SECOND
+    assert source.now_ns() == source.base_ns() + 600 * MS
+
+
+def test_now_never_runs_backwards_while_slewing(source, mono):
+    source.add_sample(0, 0)
+    source.add_sample(-900 * MS, 0)
+    readings = []
+    for _ in range(30):
+        mono.now += 100 * MS
+        readings.append(source.now_ns())
+    assert all(later > earlier for earlier, later in zip(readings, readings[1:]))
+
+
+def test_differences_above_the_step_threshold_are_stepped(source, mono):
+    source.add_sample(0, 0)
+    mono.now += SECOND
+    jump = main.TIME_STEP_THRESHOLD_MS * MS + SECOND
+    source.add_sample(jump, 0)
+    assert source.correction_ns(mono.now) == jump
+
+
+def test_difference_at_the_step_threshold_is_slewed(source, mono):
+    source.add_sample(0, 0)
+    source.add_sample(main.TIME_STEP_THRESHOLD_MS * MS, 0)
+    assert source.correction_ns(mono.now) == 0
+
+
+def test_least_delayed_sample_sets_the_target(source):
+    source.add_sample(100 * MS, 30 * MS)
+    source.add_sample(200 * MS, 5 * MS)
+    source.add_sample(300 * MS, 20 * MS)
+    assert source.slew[2] == 200 * MS
+    assert source.delay_ns == 20 * MS
+    assert source.jitter_ns > 0
+
+
+def test_ties_in_delay_go_to_the_newest_sample(source):
+    source.add_sample(100 * MS, 5 * MS)
+    source.add_sample(150 * MS, 5 * MS)
+    assert source.slew[2] == 150 * MS
+
+
+def test_old_samples_leave_the_window(source):
+    source.add_sample(100 * MS, 0)
+    for _ in range(main.TIME_SAMPLES):
+        source.add_sample(200 * MS, 10 * MS)
+    assert source.slew[2] == 200 * MS
+
+
+def test_ms_until_next_second_and_minute(source, mono):
+    margin = main.TICK_BOUNDARY_MARGIN_MS
+    # 1_000_000 s is 40 s past a minute boundary
+    mono.now += 250 * MS
+    assert source.ms_until_next(1) == 750 + margin
+    assert source.ms_until_next(60) == 19_750 + margin
+    assert source.ms_until_next(10) == 9_750 + margin
+
+
+def test_ms_until_next_follows_the_correction(source, mono):
+    source.add_sample(400 * MS, 0)
+    mono.now += 250 * MS
+    assert source.ms_until_next(1) == 350 + main.TICK_BOUNDARY_MARGIN_MS
+
+
+def test_local_parts_format_the_corrected_time(source, mono, monkeypatch):
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    try:
+        # 1_000_000 s after the epoch is 13:46:40 UTC
+        assert source.local_parts() == ("13", "46", "40")
+        source.add_sample(61 * SECOND, 0)
+        assert source.local_parts() == ("13", "47", "41")
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+@pytest.mark.parametrize("server, address", [
+    ("pool.ntp.org", ("pool.ntp.org", 123)),
+    ("ntp.example:1230", ("ntp.example", 1230)),
+    ("::1", ("::1", 123)),
+    ("[::1]:1230", ("::1", 1230)),
+])
+def test_time_server_values(server, address):
+    assert main.parse_time_server(server) == address
+
+
+@pytest.mark.parametrize("server", ["pool.ntp.org:ntp", "host:12 3", "[::1", "host:0", ":123"])
+def test_bad_time_server_falls_back_to_the_system_clock(server):
+    with pytest.raises(ValueError):
+        main.parse_time_server(server)
+    assert isinstance(main.time_reference_for({"time_server": server}), main.SystemClockReference)
+
+
+def test_wall_clock_jump_re_anchors(source, mono, monkeypatch):
+    wall = [source.base_ns()]
+    monkeypatch.setattr(main.time, "time_ns", lambda: wall[0])
+    source.add_sample(300 * MS, 0)
+    assert not source.check_wall_clock()
+    # Suspended for an hour: the monotonic clock stood still while the wall clock moved on
+    wall[0] += 3600 * SECOND
+    assert source.check_wall_clock()
+    assert source.now_ns() == wall[0]
+    assert source.wake_event.is_set()
+    # The next sample steps rather than slews
+    source.add_sample(300 * MS, 0)
+    assert source.now_ns() == wall[0] + 300 * MS
+    assert not source.check_wall_clock()
+
+
+def test_wall_clock_within_the_step_threshold_is_left_alone(source, mono, monkeypatch):
+    monkeypatch.setattr(main.time, "time_ns", lambda: source.base_ns() + main.TIME_STEP_THRESHOLD_MS * MS)
+    assert not source.check_wall_clock()
+    assert not source.wake_event.is_set()
@@ -0,0 +1,71 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+import main
+
+START = 1_704_067_200  # 2024-01-01 00:00:00 UTC
+SWEEP_DAYS = 400
+ZONES = [
+    "America/New_York", "Europe/London", "Europe/Dublin", "Asia/Tokyo", "Asia/Kolkata",
+    "Australia/Lord_Howe",  # 30-minute DST shift
+    "Africa/Casablanca",    # DST suspended for Ramadan, two transitions a few weeks apart
+    "Antarctica/Troll",     # two-hour DST shift
+    "Pacific/Chatham", "America/Santiago",
+]
+
+
+def expected_parts(zone, utc):
+    return tuple(datetime.fromtimestamp(utc, ZoneInfo(zone)).strftime("%H %M %S").split())
+
+
+def transitions(zone, start, end, step=3600):
+    """First second of each UTC offset change in [start, end), found the slow way"""
+    tz = ZoneInfo(zone)
+    offset = lambda utc: datetime.fromtimestamp(utc, tz).utcoffset()
+    found = []
+    for utc in range(start, end, step):
+        if offset(utc) != offset(utc + step):
+            low, high = utc, utc + step
+            while high - low > 1:
+                middle = (low + high) // 2
+                if offset(middle) == offset(low):
+                    low = middle
+                else:
+                    high = middle
+            found.append(high)
+    return found
+
+
+@pytest.mark.parametrize("zone", ZONES)
+def test_matches_zoneinfo_over_a_400_day_sweep(zone):
+    clock = main.ZoneClock(zone, now=START)
+    for utc in range(START, START + SWEEP_DAYS * 86400, 3600 + 17):
+        assert clock.parts(utc) == expected_parts(zone, utc), utc
+    # Cached offsets: a refresh per transition, not per tick
+    assert clock.refreshes <= 2 + len(transitions(zone, START, START + SWEEP_DAYS * 86400)) * 2
+
+
+@pytest.mark.parametrize("zone", ZONES)
+def test_transitions_land_on_the_exact_second(zone):
+    for transition in transitions(zone, START, START + SWEEP_DAYS * 86400):
+        clock = main.ZoneClock(zone, now=transition - 3 * 86400)
+        assert clock.valid_until == transition
+        for utc in (transition - 1, transition, transition + 1):
+            assert clock.parts(utc) == expected_parts(zone, utc), utc
+
+
+def test_new_york_spring_forward():
+    spring_forward = 1_710_054_000  # 2024-03-10 07:00:00 UTC, 02:00 EST -> 03:00 EDT
+    clock = main.ZoneClock("America/New_York", now=spring_forward - 3600)
+    assert clock.valid_until == spring_forward
+    assert clock.parts(spring_forward - 1) == ("01", "59", "59")
+    assert clock.parts(spring_forward) == ("03", "00", "00")
+
+
+def test_fixed_offset_zone_rechecks_after_the_horizon():
+    clock = main.ZoneClock("Asia/Kolkata", now=START)
+    assert clock.offset == 5 * 3600 + 1800
+    assert clock.valid_until > START + main.ZONE_SCAN_HORIZON - main.ZONE_SCAN_STEP
+    assert clock.parts(START) == ("05", "30", "00")